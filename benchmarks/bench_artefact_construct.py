@@ -0,0 +1,47 @@
+"""Benchmark for the construction of data artefacts
+
+Compares the validated construction of data artefacts with the trusted
+construction for bar payloads of different sizes. The compiled output of
+both artefacts is the same."""
+
+from time import perf_counter
+
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+ROW_COUNTS = [100, 10_000, 100_000]
+
+
+def create_bars(row_count: int) -> list[dict]:
+    return [
+        {
+            "datetime": f"2024-01-01 {i % 24:02d}:{i % 60:02d}:00",
+            "open": 1.0 + i,
+            "high": 2.0 + i,
+            "low": 0.5 + i,
+            "close": 1.5 + i,
+            "volume": i,
+        }
+        for i in range(row_count)
+    ]
+
+
+def bench(row_count: int) -> None:
+    bars = create_bars(row_count)
+    start = perf_counter()
+    validated = LLMAdvisorDataArtefact(description="Bars", artefact=bars)
+    validated_time = perf_counter() - start
+    start = perf_counter()
+    trusted = LLMAdvisorDataArtefact.from_trusted(bars, description="Bars")
+    trusted_time = perf_counter() - start
+    if row_count <= 10_000:
+        assert compile_data_artefacts(validated) == compile_data_artefacts(trusted)
+    print(
+        f"{row_count:>9} {validated_time:>11.6f}s {trusted_time:>11.6f}s"
+        f" {validated_time / trusted_time:>9.0f}x"
+    )
+
+
+print(f"{'rows':>9} {'validated':>12} {'trusted':>12} {'speedup':>10}")
+for row_count in ROW_COUNTS:
+    bench(row_count)
@@ -0,0 +1,64 @@
+"""Benchmark for the datetime handling of the data artefact compiler
+
+Compares the previous parse-sort-format cycle with the typed datetime
+handling for bar series of different sizes. The cached run compiles the
+same bars again, like a moving window of bars does."""
+
+from time import perf_counter
+
+from pandas import DataFrame, date_range, to_datetime
+
+from llm_advisory.helper.llm_prompt import (
+    _get_datetime_formatter,
+    _normalize_datetime_column,
+)
+
+ROW_COUNTS = [1_000, 100_000, 1_000_000]
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def normalize_datetime_column_previous(
+    df: DataFrame, datetime_format: str | None = None
+) -> DataFrame:
+    df["datetime"] = to_datetime(df["datetime"], errors="coerce")
+    df = df.set_index("datetime").sort_index()
+    df.reset_index(inplace=True)
+    df["datetime"] = df["datetime"].dt.strftime(datetime_format)
+    return df
+
+
+def bench(row_count: int) -> None:
+    datetimes = date_range("2000-01-01", periods=row_count, freq="min")
+    inputs = {
+        "strings": datetimes.strftime(DATETIME_FORMAT),
+        "datetime64": datetimes,
+        "epoch ints": datetimes.astype("int64") // 10**9,
+    }
+    for name, values in inputs.items():
+        df = DataFrame({"datetime": values, "close": range(row_count)})
+        start = perf_counter()
+        previous = normalize_datetime_column_previous(df.copy(), DATETIME_FORMAT)
+        previous_time = perf_counter() - start
+        _get_datetime_formatter.cache_clear()
+        start = perf_counter()
+        current = _normalize_datetime_column(df.copy(), DATETIME_FORMAT)
+        current_time = perf_counter() - start
+        start = perf_counter()
+        _normalize_datetime_column(df.copy(), DATETIME_FORMAT)
+        cached_time = perf_counter() - start
+        if name != "epoch ints":
+            # epoch ints were parsed as nanoseconds previously
+            assert previous["datetime"].tolist() == current["datetime"].tolist()
+        print(
+            f"{row_count:>9} {name:<12}"
+            f" {previous_time:>10.4f}s {current_time:>10.4f}s {cached_time:>10.4f}s"
+            f" {previous_time / cached_time:>6.1f}x"
+        )
+
+
+print(
+    f"{'rows':>9} {'input':<12} {'previous':>11} {'current':>11} {'cached':>11}"
+    f" {'speedup':>7}"
+)
+for row_count in ROW_COUNTS:
+    bench(row_count)
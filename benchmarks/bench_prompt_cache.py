@@ -0,0 +1,87 @@
+"""Benchmark for provider side prompt caching
+
+Runs the same advisor panel with the default and the cache friendly prompt
+layout and reports the input tokens and the cached input tokens from the
+usage metadata. Needs a configured provider (see examples), OpenAI reports
+cached tokens for prompts with more than 1024 tokens.
+
+Ollama does not report cached tokens, it evaluates only the part of the prompt
+which is not in its cache. For Ollama the evaluated prompt tokens and the
+prompt eval duration from the response metadata are reported instead, a reused
+prefix shows as a drop of them across the runs and the layouts."""
+
+import os
+from time import perf_counter
+
+from dotenv import load_dotenv
+
+from llm_advisory import LLMAdvisory
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+    LLMAdvisorPromptLayout,
+)
+
+load_dotenv()
+
+PANEL_SIZE = 8
+REPEATS = 2
+
+input_data = [
+    LLMAdvisorDataArtefact(
+        description="Bars of the last days",
+        artefact=[
+            {
+                "datetime": f"2025-01-{1 + i // 24:02d} {i % 24:02d}:00:00",
+                "open": 100 + i * 0.1,
+                "high": 101 + i * 0.1,
+                "low": 99 + i * 0.1,
+                "close": 100.5 + i * 0.1,
+                "volume": 1000 + i,
+            }
+            for i in range(24 * 7)
+        ],
+        output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+    )
+]
+
+for prompt_layout in LLMAdvisorPromptLayout:
+    advisory = LLMAdvisory(
+        model_provider_name=os.getenv("LLM_MODEL_PROVIDER"),
+        model_name=os.getenv("LLM_MODEL"),
+        model_config={
+            "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+            "OLLAMA_BASE_URL": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        },
+        advisors=[
+            PersonaAdvisor(
+                f"Trader {i}",
+                f"You are trader number {i} and trade the trend of the bars.",
+            )
+            for i in range(PANEL_SIZE)
+        ],
+        prompt_layout=prompt_layout,
+    )
+    for run in range(REPEATS):
+        start = perf_counter()
+        advisory_response = advisory.get_advisory(input_data=input_data)
+        duration = perf_counter() - start
+        input_tokens = cached_tokens = 0
+        for usage in advisory_response.get_usage_metadata().values():
+            input_tokens += usage.get("input_tokens", 0)
+            cached_tokens += usage.get("input_token_details", {}).get("cache_read", 0)
+        # ollama: tokens and nanoseconds of the evaluated (not cached) prompt
+        eval_tokens = eval_duration = 0
+        for metadata in advisory_response.get_response_metadata().values():
+            eval_tokens += metadata.get("prompt_eval_count") or 0
+            eval_duration += metadata.get("prompt_eval_duration") or 0
+        print(
+            f"{prompt_layout.name:<15} run {run}:"
+            f" input tokens {input_tokens:>7}"
+            f" cached tokens {cached_tokens:>7}"
+            f" ({cached_tokens / max(input_tokens, 1):.0%})"
+            f" prompt eval tokens {eval_tokens:>7}"
+            f" prompt eval {eval_duration / 1e9:.2f}s"
+            f" duration {duration:.2f}s"
+        )
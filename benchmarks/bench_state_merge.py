@@ -0,0 +1,103 @@
+"""Benchmark for the state merging of an advisor panel fan-in
+
+Compares the copying reducers with the in place reducers and measures the
+state handling of an advisory for growing panel sizes."""
+
+from time import perf_counter
+
+from langchain_core.messages import AIMessage
+
+from llm_advisory import LLMAdvisory, LLMAdvisor
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorSignal,
+    merge_dicts,
+    update_dict,
+    extend_list,
+)
+
+PANEL_SIZES = [10, 50, 100, 200]
+REPEATS = 3
+
+
+def bench_reducers(panel_size: int) -> tuple[float, float]:
+    updates = [
+        (
+            [AIMessage(content="signal", name=f"Advisor{i}")],
+            {f"Advisor{i}": LLMAdvisorSignal()},
+        )
+        for i in range(panel_size)
+    ]
+    start = perf_counter()
+    messages, signals = [], {}
+    for message_update, signal_update in updates:
+        messages = messages + message_update
+        signals = merge_dicts(signals, signal_update)
+    copy_time = perf_counter() - start
+    start = perf_counter()
+    messages, signals = [], {}
+    for message_update, signal_update in updates:
+        messages = extend_list(messages, message_update)
+        signals = update_dict(signals, signal_update)
+    inplace_time = perf_counter() - start
+    return copy_time, inplace_time
+
+
+class StateOnlyAdvisor(LLMAdvisor):
+    """Advisor without llm call, only the state handling is measured"""
+
+    def __init__(self, advisor_name: str):
+        super().__init__()
+        self.advisor_name = advisor_name
+
+    def update_state(self, state):
+        state = self._get_state(state)
+        message = AIMessage(content=state.messages[0].content, name=self.advisor_name)
+        return {
+            "messages": [message],
+            "signals": {self.advisor_name: LLMAdvisorSignal()},
+            "conversations": {self.advisor_name: [message]},
+        }
+
+
+def bench_advisory(panel_size: int, state_only: bool = False) -> float:
+    if state_only:
+        advisors = [StateOnlyAdvisor(f"Advisor{i}") for i in range(panel_size)]
+    else:
+        advisors = [
+            PersonaAdvisor(f"Advisor {i}", "Benchmark advisor")
+            for i in range(panel_size)
+        ]
+    advisory = LLMAdvisory(
+        model_provider_name="ollama",
+        model_name="gemma3",
+        advisors=advisors,
+    )
+    advisory.metadata["llm"] = LLMFakeSignalModel()
+    input_data = [
+        LLMAdvisorDataArtefact(
+            description="Bars",
+            artefact=[{"close": float(i), "volume": i} for i in range(100)],
+        )
+    ]
+    timings = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        advisory.get_advisory("Benchmark", input_data)
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+print(f"{'merges':>6} {'copy merge':>12} {'inplace merge':>14}")
+for panel_size in PANEL_SIZES:
+    copy_time, inplace_time = bench_reducers(panel_size * 100)
+    print(f"{panel_size * 100:>6} {copy_time:>11.4f}s {inplace_time:>13.4f}s")
+
+print()
+print(f"{'panel':>6} {'state only':>12} {'fake llm':>12}")
+for panel_size in PANEL_SIZES:
+    state_time = bench_advisory(panel_size, state_only=True)
+    advisory_time = bench_advisory(panel_size)
+    print(f"{panel_size:>6} {state_time:>11.4f}s {advisory_time:>11.4f}s")
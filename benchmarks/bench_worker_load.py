@@ -0,0 +1,128 @@
+"""Load test for the advisory worker
+
+Starts the worker as a process with advisories using a fake model, sends a
+batch of jobs over stdin or a Unix socket and measures the throughput and
+latency for different concurrency limits. The fake model adds a fixed
+latency per llm call, so no provider is needed.
+
+The elapsed time of stdin includes the startup of the worker process, which
+is paid once per worker instead of once per job."""
+
+import os
+import socket
+import subprocess
+import sys
+from json import dumps, loads
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+
+from llm_advisory import LLMAdvisory
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+
+JOB_COUNT = 100
+CONCURRENCY = [1, 8, 32]
+MODEL_LATENCY = 0.05
+
+
+def create_advisory() -> LLMAdvisory:
+    """Factory used by the worker process"""
+    advisory = LLMAdvisory(
+        advisors=[PersonaAdvisor(f"Person {i}", f"Test person {i}") for i in range(3)],
+        model_provider_name="ollama",
+        model_name="gemma3",
+    )
+    advisory.metadata["llm"] = LLMFakeSignalModel(latency=MODEL_LATENCY)
+    return advisory
+
+
+def create_jobs() -> str:
+    return "".join(
+        dumps(
+            {
+                "id": i,
+                "message": "Make an advise",
+                "input_data": [
+                    {"description": "Close", "artefact": [1.0 + i, 2.0, 3.0]}
+                ],
+            }
+        )
+        + "\n"
+        for i in range(JOB_COUNT)
+    )
+
+
+def start_worker(max_concurrency: int, *args: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "llm_advisory.worker",
+            "--factory",
+            f"{Path(__file__).stem}:create_advisory",
+            "--max-concurrency",
+            str(max_concurrency),
+            *args,
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        cwd=Path(__file__).parent,
+    )
+
+
+def bench_stdin(max_concurrency: int) -> tuple[float, list[dict], dict]:
+    process = start_worker(max_concurrency)
+    start = perf_counter()
+    stdout, stderr = process.communicate(create_jobs())
+    elapsed = perf_counter() - start
+    results = [loads(line) for line in stdout.splitlines()]
+    return elapsed, results, loads(stderr.splitlines()[-1])
+
+
+def send_lines(socket_path: str, data: str) -> list[dict]:
+    """Sends lines to the worker socket and returns the result lines"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(data.encode())
+        client.shutdown(socket.SHUT_WR)
+        with client.makefile() as reader:
+            return [loads(line) for line in reader]
+
+
+def bench_socket(max_concurrency: int) -> tuple[float, list[dict], dict]:
+    with TemporaryDirectory() as path:
+        socket_path = os.path.join(path, "worker.sock")
+        process = start_worker(max_concurrency, "--socket", socket_path)
+        while not os.path.exists(socket_path):
+            sleep(0.01)
+        start = perf_counter()
+        results = send_lines(socket_path, create_jobs())
+        elapsed = perf_counter() - start
+        stats = send_lines(socket_path, dumps({"command": "stats"}))[0]["stats"]
+        process.terminate()
+        process.communicate()
+    return elapsed, results, stats
+
+
+def report(name: str, max_concurrency: int, elapsed, results, stats):
+    errors = sum(1 for result in results if "error" in result)
+    print(
+        f"{name:<7} {max_concurrency:>11} {len(results):>5} {errors:>6}"
+        f" {elapsed:>8.2f}s {len(results) / elapsed:>9.1f}/s"
+        f" {stats['latency_p50']:>8.3f}s {stats['latency_p95']:>8.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    print(
+        f"{'input':<7} {'concurrency':>11} {'jobs':>5} {'errors':>6}"
+        f" {'elapsed':>9} {'throughput':>11} {'p50':>9} {'p95':>9}"
+    )
+    for max_concurrency in CONCURRENCY:
+        report("stdin", max_concurrency, *bench_stdin(max_concurrency))
+        report("socket", max_concurrency, *bench_socket(max_concurrency))
@@ -1,7 +1,18 @@
 from .llm_model_provider import LLMModelProvider
 from .llm_advisor import LLMAdvisor
 from .llm_advisory import LLMAdvisory
+from .llm_advisory_runner import LLMAdvisoryProcessRunner
+from .llm_advisory_governor import LLMAdvisoryGovernor
+from .llm_advisory_store import LLMAdvisoryStore
 
 __version__ = "0.0.1"
 
-__all__ = ["LLMModelProvider", "LLMAdvisor", "LLMAdvisory", "__version__"]
+__all__ = [
+    "LLMModelProvider",
+    "LLMAdvisor",
+    "LLMAdvisory",
+    "LLMAdvisoryProcessRunner",
+    "LLMAdvisoryGovernor",
+    "LLMAdvisoryStore",
+    "__version__",
+]
@@ -21,8 +21,14 @@ class PersonaAdvisor(LLMAdvisor):
         person_name: str,
         # description of the personality, which also can contain informations about needed knowledge
         personality: str,
+        # reuse signals for equal data up to max age in seconds, None to disable
+        signal_cache_max_age: float | None = None,
+        signal_cache_float_precision: int = 6,
     ):
-        super().__init__()
+        super().__init__(
+            signal_cache_max_age=signal_cache_max_age,
+            signal_cache_float_precision=signal_cache_float_precision,
+        )
         self.advisor_name_default = self.advisor_name
         self.advisor_name = f"{self.advisor_name_default}{person_name.replace(" ", "")}"
         self.advisor_messages_input.advisor_instructions = (
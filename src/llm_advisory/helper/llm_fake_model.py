@@ -0,0 +1,103 @@
+from json import dumps
+from operator import itemgetter
+from time import sleep
+from typing import Any, Iterator
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableMap, RunnablePassthrough
+from pydantic import Field
+
+
+class LLMFakeSignalModel(BaseChatModel):
+    """Fake chat model returning signals
+
+    Used for tests, benchmarks and load tests, no requests are sent to a provider.
+    The responses are returned in order and repeated when exhausted."""
+
+    responses: list[dict[str, Any] | str] = Field(
+        default_factory=lambda: [
+            {"signal": "neutral", "confidence": 0.5, "reasoning": "Fake reasoning"}
+        ]
+    )
+    # latency in seconds for every call
+    latency: float = 0.0
+    # number of calls made to the model
+    calls: int = 0
+    # number of chunks streamed by the model
+    chunks: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-signal"
+
+    def _next_response(self) -> str:
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        if isinstance(response, str):
+            return response
+        return dumps(response)
+
+    def _get_usage_metadata(self, messages: list[BaseMessage], content: str) -> dict:
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(content) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            sleep(self.latency)
+        content = self._next_response()
+        message = AIMessage(
+            content=content,
+            usage_metadata=self._get_usage_metadata(messages, content),
+            response_metadata={"model_name": self._llm_type},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        content = self._next_response()
+        for i in range(0, len(content), 4):
+            if self.latency:
+                sleep(self.latency / max(len(content) / 4, 1))
+            self.chunks += 1
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=content[i : i + 4])
+            )
+
+    def with_structured_output(
+        self,
+        schema: Any,
+        *,
+        include_raw: bool = False,
+        **kwargs: Any,
+    ):
+        parser = PydanticOutputParser(pydantic_object=schema)
+        if not include_raw:
+            return self | parser
+        parser_assign = RunnablePassthrough.assign(
+            parsed=itemgetter("raw") | parser, parsing_error=lambda _: None
+        )
+        parser_none = RunnablePassthrough.assign(parsed=lambda _: None)
+        parser_with_fallback = parser_assign.with_fallbacks(
+            [parser_none], exception_key="parsing_error"
+        )
+        return RunnableMap(raw=self) | parser_with_fallback
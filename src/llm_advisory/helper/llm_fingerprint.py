@@ -0,0 +1,78 @@
+import re
+from datetime import datetime, timezone
+from hashlib import sha256
+from json import dumps
+from typing import Any
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactValue,
+)
+
+# strings in iso format like 2024-01-01, 2024-01-01 10:00 or 2024-01-01T10:00:00Z
+DATETIME_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}"
+    r"([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?"
+    r"(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+
+def _canonicalize_datetime(value: datetime) -> str:
+    """Returns a datetime as iso string, aware datetimes are converted to utc"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def canonicalize_artefact_value(value: Any, float_precision: int = 6) -> Any:
+    """Returns a canonical form of artefact data
+
+    Nested artefacts are unwrapped, floats are rounded to float_precision and
+    datetimes and datetime strings are converted to iso strings. Dict keys are
+    sorted when dumped, so the key order is not relevant."""
+    if isinstance(value, LLMAdvisorDataArtefact):
+        return {
+            "description": value.description,
+            "artefact": canonicalize_artefact_value(value.artefact, float_precision),
+            "output_mode": value.output_mode.value,
+        }
+    if isinstance(value, LLMAdvisorDataArtefactValue):
+        return canonicalize_artefact_value(value.root, float_precision)
+    if isinstance(value, dict):
+        return {
+            str(k): canonicalize_artefact_value(v, float_precision)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [canonicalize_artefact_value(v, float_precision) for v in value]
+    if isinstance(value, float):
+        # + 0.0 removes the sign of -0.0
+        return round(value, float_precision) + 0.0
+    if isinstance(value, datetime):
+        return _canonicalize_datetime(value)
+    if isinstance(value, str) and DATETIME_PATTERN.match(value):
+        try:
+            return _canonicalize_datetime(datetime.fromisoformat(value))
+        except ValueError:
+            return value
+    return value
+
+
+def fingerprint_data_artefacts(
+    data_artefacts: LLMAdvisorDataArtefact | list[LLMAdvisorDataArtefact],
+    float_precision: int = 6,
+) -> str:
+    """Returns a stable fingerprint for the canonical form of data artefacts
+
+    Data artefacts which only differ in float noise, key order or datetime
+    formatting have the same fingerprint"""
+    if not isinstance(data_artefacts, list):
+        data_artefacts = [data_artefacts]
+    canonical = canonicalize_artefact_value(data_artefacts, float_precision)
+    return fingerprint_values(canonical)
+
+
+def fingerprint_values(*values: Any) -> str:
+    """Returns a fingerprint for json serializable values"""
+    data = dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return sha256(data.encode()).hexdigest()
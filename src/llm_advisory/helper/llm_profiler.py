@@ -0,0 +1,128 @@
+from hashlib import sha256
+from string import Formatter
+from threading import Lock
+
+from pandas import DataFrame
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorMessagesInput,
+    LLMPromptSectionProfile,
+)
+from llm_advisory.llm_advisory_governor import estimate_text_tokens
+
+# section for the template text around the placeholders
+TEMPLATE_SECTION = "template"
+
+
+class LLMPromptProfiler:
+    """Profiler for the size of rendered advisor prompts
+
+    Every prompt message is broken down into the sections of its template
+    (like advisor_instructions or advisor_data) with characters and estimated
+    tokens. Sections with content already seen in another section or advisor
+    are flagged as duplicate.
+
+    A profiler is passed to get_advisory to profile all advisors of a call."""
+
+    def __init__(self):
+        self.sections: list[LLMPromptSectionProfile] = []
+        self._seen: dict[str, str] = {}
+        self._lock = Lock()
+
+    def add_prompt(
+        self,
+        advisor_name: str,
+        templates: list[tuple[str, str]],
+        messages_input: LLMAdvisorMessagesInput,
+    ):
+        """Adds the sections of the prompt messages of an advisor
+
+        templates are the message type and template of every prompt message,
+        the sections are rendered with the values of messages_input"""
+        values = messages_input.model_dump()
+        with self._lock:
+            for i, (message_type, template) in enumerate(templates):
+                template_text = ""
+                for literal_text, section, _, _ in Formatter().parse(template):
+                    template_text += literal_text
+                    if section:
+                        self.sections.append(
+                            self._create_section(
+                                advisor_name,
+                                i,
+                                message_type,
+                                section,
+                                str(values.get(section, "")),
+                            )
+                        )
+                self.sections.append(
+                    LLMPromptSectionProfile(
+                        advisor=advisor_name,
+                        message=i,
+                        message_type=message_type,
+                        section=TEMPLATE_SECTION,
+                        chars=len(template_text),
+                        tokens=estimate_text_tokens(template_text),
+                    )
+                )
+
+    def _create_section(
+        self,
+        advisor_name: str,
+        message: int,
+        message_type: str,
+        section: str,
+        text: str,
+    ) -> LLMPromptSectionProfile:
+        """Creates the profile of a section, duplicates are flagged"""
+        duplicate_of = None
+        if text:
+            key = sha256(text.encode()).hexdigest()
+            location = f"{advisor_name}/{message}/{section}"
+            duplicate_of = self._seen.setdefault(key, location)
+            if duplicate_of == location:
+                duplicate_of = None
+        return LLMPromptSectionProfile(
+            advisor=advisor_name,
+            message=message,
+            message_type=message_type,
+            section=section,
+            chars=len(text),
+            tokens=estimate_text_tokens(text),
+            duplicate_of=duplicate_of,
+        )
+
+    def get_dataframe(self) -> DataFrame:
+        """Returns the profiled sections as dataframe"""
+        with self._lock:
+            sections = [section.model_dump() for section in self.sections]
+        return DataFrame(sections, columns=list(LLMPromptSectionProfile.model_fields))
+
+    def get_report(self) -> str:
+        """Returns a markdown report of the profiled prompts
+
+        Contains the totals by section, the duplicated tokens and all
+        profiled sections"""
+        df = self.get_dataframe()
+        totals = (
+            df.groupby("section")[["chars", "tokens"]]
+            .sum()
+            .sort_values("tokens", ascending=False)
+            .reset_index()
+        )
+        duplicates = df[df["duplicate_of"].notna()]
+        lines = [
+            "# Prompt profile",
+            "",
+            f"Total tokens: {df['tokens'].sum()}",
+            f"Duplicated tokens: {duplicates['tokens'].sum()}",
+            "",
+            "## Sections",
+            "",
+            totals.to_markdown(index=False),
+            "",
+            "## Prompts",
+            "",
+            df.fillna({"duplicate_of": ""}).to_markdown(index=False),
+        ]
+        return "\n".join(lines)
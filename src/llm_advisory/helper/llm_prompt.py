@@ -1,7 +1,24 @@
+from functools import lru_cache
 from json import dumps
+from threading import Lock
 from typing import get_args, get_origin, Literal, Any
 
-from pandas import DataFrame, json_normalize, to_datetime
+from numpy import concatenate, dtype, empty, full, nan
+from pandas import (
+    DataFrame,
+    DatetimeIndex,
+    DatetimeTZDtype,
+    Index,
+    Series,
+    json_normalize,
+    to_datetime,
+    unique,
+)
+from pandas.api.types import (
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_numeric_dtype,
+)
 from pydantic import BaseModel
 from llm_advisory.pydantic_models import (
     LLMAdvisorDataArtefact,
@@ -11,72 +28,155 @@ from llm_advisory.pydantic_models import (
 )
 
 
+def _create_dataframe(
+    input_data: list[dict[str, Any]] | dict[str, Any],
+    datetime_format: str | None = None,
+    datetime_unit: str = "s",
+) -> DataFrame:
+    """Creates a dataframe from the artefact data"""
+    # mixed list of dicts and key-value pair lists — merge into a single dict
+    if isinstance(input_data, list) and any(
+        not isinstance(item, dict) for item in input_data
+    ):
+        merged_dict = {}
+        for data_entry in input_data:
+            if isinstance(data_entry, dict):
+                merged_dict.update(data_entry)
+            elif isinstance(data_entry, list) and all(
+                isinstance(pair, list) and len(pair) == 2 for pair in data_entry
+            ):
+                merged_dict.update({pair[0]: pair[1] for pair in data_entry})
+        input_data = merged_dict
+
+    # list of dicts — directly usable
+    if isinstance(input_data, list) and all(isinstance(d, dict) for d in input_data):
+        df = DataFrame(input_data)
+
+    # dict of list of dicts (tag rows with key)
+    elif isinstance(input_data, dict) and all(
+        isinstance(v, list) and all(isinstance(i, dict) for i in v)
+        for v in input_data.values()
+    ):
+        rows = []
+        for key, records in input_data.items():
+            for record in records:
+                rows.append({"__group__": key, **record})
+        df = DataFrame(rows)
+
+    # simple nested dict — flatten it
+    else:
+        df = json_normalize(input_data)
+    if "datetime" in df.columns:
+        df = _normalize_datetime_column(df, datetime_format, datetime_unit)
+
+    return df
+
+
+def _normalize_datetime_column(
+    df: DataFrame, datetime_format: str | None = None, datetime_unit: str = "s"
+) -> DataFrame:
+    """Parses, sorts and formats the datetime column
+
+    Already parsed datetime64 columns are not parsed again, epoch numbers are
+    converted with datetime_unit. Data which is already sorted is not sorted
+    again. The datetime column is moved to the first column."""
+    values = df.pop("datetime")
+    if is_numeric_dtype(values) and not is_bool_dtype(values):
+        values = to_datetime(values, unit=datetime_unit, errors="coerce")
+    elif not is_datetime64_any_dtype(values):
+        values = to_datetime(values, errors="coerce")
+    df.insert(0, "datetime", values)
+    if not values.is_monotonic_increasing:
+        df = df.sort_values("datetime", kind="stable", ignore_index=True)
+    df["datetime"] = _format_datetime(df["datetime"], datetime_format)
+    return df
+
+
+class _DatetimeFormatter:
+    """Vectorized datetime formatter with a cache of formatted values
+
+    Compiling overlapping data (like a moving window of bars) formats the same
+    datetimes again on every call, only datetimes not in the cache are
+    formatted. The newest max_size values are kept, larger inputs are formatted
+    without cache."""
+
+    def __init__(
+        self, datetime_format: str, values_dtype: dtype, max_size: int = 100_000
+    ):
+        self.datetime_format = datetime_format
+        self.values_dtype = values_dtype
+        self.max_size = max_size
+        self._keys = Index([], dtype="int64")
+        self._values = empty(0, dtype=object)
+        self._lock = Lock()
+
+    def __call__(self, values: Series) -> Series:
+        if len(values) > self.max_size:
+            return values.dt.strftime(self.datetime_format)
+        keys = values.to_numpy().view("int64")
+        valid = values.notna().to_numpy()
+        with self._lock:
+            cache_keys, cache_values = self._keys, self._values
+            positions = cache_keys.get_indexer(keys)
+            missing = valid & (positions < 0)
+            if missing.any():
+                new_keys = unique(keys[missing])
+                new_values = DatetimeIndex(new_keys.view(self.values_dtype)).strftime(
+                    self.datetime_format
+                )
+                cache_keys = cache_keys.append(Index(new_keys))
+                cache_values = concatenate(
+                    [cache_values, new_values.to_numpy(dtype=object)]
+                )
+                positions = cache_keys.get_indexer(keys)
+                self._keys = cache_keys[-self.max_size :]
+                self._values = cache_values[-self.max_size :]
+        result = full(len(keys), nan, dtype=object)
+        result[valid] = cache_values.take(positions[valid])
+        return Series(result, index=values.index)
+
+
+@lru_cache(maxsize=32)
+def _get_datetime_formatter(
+    datetime_format: str, values_dtype: dtype
+) -> _DatetimeFormatter:
+    """Returns the cached formatter for a datetime format and dtype"""
+    return _DatetimeFormatter(datetime_format, values_dtype)
+
+
+def _format_datetime(values: Series, datetime_format: str | None = None) -> Series:
+    """Formats datetime values, missing values are returned as NaN
+
+    The default format depends on all values (like date only values), so only
+    values with an explicit format and without timezone are cached"""
+    if datetime_format is None or isinstance(values.dtype, DatetimeTZDtype):
+        return values.dt.strftime(datetime_format)
+    return _get_datetime_formatter(datetime_format, values.dtype)(values)
+
+
 def compile_data_artefacts(
     data_artefacts: LLMAdvisorDataArtefact | list[LLMAdvisorDataArtefact],
     datetime_format: str | None = None,
+    datetime_unit: str = "s",
 ) -> str:
-    """Data artefact compiler which takes all provided artefacts and converts them to strings"""
+    """Data artefact compiler which takes all provided artefacts and converts them to strings
+
+    datetime_unit is the unit of epoch numbers in datetime columns"""
     if data_artefacts is None:
         return ""
 
-    def _create_dataframe(
-        input_data: list[dict[str, Any]] | dict[str, Any],
-        datetime_format: str | None = None,
-    ) -> DataFrame:
-        # mixed list of dicts and key-value pair lists — merge into a single dict
-        if isinstance(input_data, list) and any(
-            not isinstance(item, dict) for item in input_data
-        ):
-            merged_dict = {}
-            for data_entry in input_data:
-                if isinstance(data_entry, dict):
-                    merged_dict.update(data_entry)
-                elif isinstance(data_entry, list) and all(
-                    isinstance(pair, list) and len(pair) == 2 for pair in data_entry
-                ):
-                    merged_dict.update({pair[0]: pair[1] for pair in data_entry})
-            input_data = merged_dict
-
-        # list of dicts — directly usable
-        if isinstance(input_data, list) and all(
-            isinstance(d, dict) for d in input_data
-        ):
-            df = DataFrame(input_data)
-
-        # dict of list of dicts (tag rows with key)
-        elif isinstance(input_data, dict) and all(
-            isinstance(v, list) and all(isinstance(i, dict) for i in v)
-            for v in input_data.values()
-        ):
-            rows = []
-            for key, records in input_data.items():
-                for record in records:
-                    rows.append({"__group__": key, **record})
-            df = DataFrame(rows)
-
-        # simple nested dict — flatten it
-        else:
-            df = json_normalize(input_data)
-        if "datetime" in df.columns:
-            df["datetime"] = to_datetime(df["datetime"], errors="coerce")
-            df = df.set_index("datetime").sort_index()
-            df.reset_index(inplace=True)
-            df["datetime"] = df["datetime"].dt.strftime(datetime_format)
-
-        return df
-
     def _generate_json_object(
         data: list[dict[str, Any]] | dict[str, Any], datetime_format: str | None = None
     ) -> str:
         """Generates a json string from a list of dict values"""
-        df = _create_dataframe(data, datetime_format)
+        df = _create_dataframe(data, datetime_format, datetime_unit)
         return f"```\n{dumps(df.to_dict("records"), indent=2)}\n```"
 
     def _generate_markdown_table(
         data: dict[str, list[str, float]], datetime_format: str | None = None
     ) -> str:
         """Generates a data table for a list of dict values"""
-        df = _create_dataframe(data, datetime_format)
+        df = _create_dataframe(data, datetime_format, datetime_unit)
         return f"```\n{df.to_markdown(index=False)}\n```"
 
     output = []
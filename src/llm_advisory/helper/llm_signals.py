@@ -0,0 +1,113 @@
+from typing import Any, Iterable
+
+from numpy import array, empty, ndarray
+from pandas import DataFrame
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorSignal,
+    LLMAdvisorState,
+    LLMAdvisoryResponse,
+)
+
+
+class LLMSignalRecord:
+    """Compact record of an advisor signal
+
+    Uses slots instead of a pydantic model, so large numbers of signals can
+    be held and converted without validation overhead"""
+
+    __slots__ = ("advisor", "signal", "confidence", "reasoning")
+
+    def __init__(self, advisor: str, signal: str, confidence: float, reasoning: str):
+        self.advisor = advisor
+        self.signal = signal
+        self.confidence = confidence
+        self.reasoning = reasoning
+
+    def __repr__(self):
+        return (
+            f"LLMSignalRecord(advisor={self.advisor!r}, signal={self.signal!r},"
+            f" confidence={self.confidence!r})"
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, LLMSignalRecord):
+            return NotImplemented
+        return self.to_tuple() == other.to_tuple()
+
+    @classmethod
+    def from_signal(cls, advisor: str, signal: LLMAdvisorSignal) -> "LLMSignalRecord":
+        """Creates a record from a signal of an advisor"""
+        return cls(advisor, signal.signal, signal.confidence, signal.reasoning)
+
+    def to_tuple(self) -> tuple[str, str, float, str]:
+        """Returns the record as tuple"""
+        return (self.advisor, self.signal, self.confidence, self.reasoning)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the record as dict, the advisor is returned as name"""
+        return {
+            "name": self.advisor,
+            "signal": self.signal,
+            "confidence": self.confidence,
+            "reasoning": self.reasoning,
+        }
+
+
+def get_signal_records(state: LLMAdvisorState) -> list[LLMSignalRecord]:
+    """Returns the signals of a state as records"""
+    return [
+        LLMSignalRecord.from_signal(advisor, signal)
+        for advisor, signal in state.signals.items()
+    ]
+
+
+def _get_signal_columns(
+    responses: Iterable[LLMAdvisoryResponse],
+) -> dict[str, list[Any]]:
+    """Returns the signals of responses as columns"""
+    columns = {
+        "response": [],
+        "advisor": [],
+        "signal": [],
+        "confidence": [],
+        "reasoning": [],
+    }
+    for i, response in enumerate(responses):
+        for advisor, signal in response.state.signals.items():
+            columns["response"].append(i)
+            columns["advisor"].append(advisor)
+            columns["signal"].append(signal.signal)
+            columns["confidence"].append(signal.confidence)
+            columns["reasoning"].append(signal.reasoning)
+    return columns
+
+
+def responses_to_array(responses: Iterable[LLMAdvisoryResponse]) -> ndarray:
+    """Returns the signals of responses as numpy structured array
+
+    One row per signal with the index of the response, the advisor and signal
+    are fixed width strings, the reasoning is stored as object"""
+    columns = _get_signal_columns(responses)
+    advisor_size = max(map(len, columns["advisor"]), default=1)
+    signal_size = max(map(len, columns["signal"]), default=1)
+    values = empty(
+        len(columns["response"]),
+        dtype=[
+            ("response", "i8"),
+            ("advisor", f"U{advisor_size}"),
+            ("signal", f"U{signal_size}"),
+            ("confidence", "f8"),
+            ("reasoning", "O"),
+        ],
+    )
+    for name, column in columns.items():
+        values[name] = array(column, dtype=values.dtype[name])
+    return values
+
+
+def responses_to_dataframe(responses: Iterable[LLMAdvisoryResponse]) -> DataFrame:
+    """Returns the signals of responses as dataframe, one row per signal"""
+    return DataFrame(_get_signal_columns(responses)).astype(
+        {"response": "int64", "confidence": "float64"}
+    )
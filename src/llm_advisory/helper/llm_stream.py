@@ -0,0 +1,111 @@
+from json import JSONDecodeError, loads
+from typing import Any
+
+from langchain_core.utils.json import parse_partial_json
+
+THINK_START = "<think>"
+THINK_END = "</think>"
+
+
+class LLMSignalStreamParser:
+    """Incremental parser for a json object in a stream of tokens
+
+    Text before the object and reasoning in think tags of reasoning models are
+    skipped. The object is complete as soon as its closing bracket was fed,
+    so the stream can be closed without waiting for tokens generated after
+    the signal."""
+
+    def __init__(self):
+        self.result: dict[str, Any] | None = None
+        self._text = ""
+        self._pos = 0
+        self._start: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._in_think = False
+
+    @property
+    def done(self) -> bool:
+        """Returns if a complete object was parsed"""
+        return self.result is not None
+
+    @property
+    def partial(self) -> dict[str, Any] | None:
+        """Returns the object parsed so far
+
+        Open strings are closed, so a reasoning field streaming in is
+        returned with the text received so far"""
+        if self.result is not None:
+            return self.result
+        if self._start is None:
+            return None
+        partial = parse_partial_json(self._text[self._start : self._pos])
+        if not isinstance(partial, dict):
+            return None
+        return partial
+
+    def feed(self, text: str) -> dict[str, Any] | None:
+        """Feeds text to the parser, returns the object when complete"""
+        if self.result is not None:
+            return self.result
+        self._text += text
+        while self._pos < len(self._text):
+            if self._start is None:
+                if not self._skip_text():
+                    break
+                continue
+            char = self._text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        result = loads(self._text[self._start : self._pos])
+                    except JSONDecodeError:
+                        result = None
+                    if isinstance(result, dict):
+                        self.result = result
+                        return result
+                    # no valid object, continue after the opening bracket
+                    self._pos = self._start + 1
+                    self._start = None
+        return None
+
+    def _skip_text(self) -> bool:
+        """Skips text outside of the object, returns False if more text is needed"""
+        if self._in_think:
+            end = self._text.find(THINK_END, self._pos)
+            if end == -1:
+                # the end tag may be split over tokens
+                self._pos = max(self._pos, len(self._text) - len(THINK_END) + 1)
+                return False
+            self._pos = end + len(THINK_END)
+            self._in_think = False
+            return True
+        char = self._text[self._pos]
+        if char == "<":
+            tag = self._text[self._pos : self._pos + len(THINK_START)]
+            if tag == THINK_START:
+                self._pos += len(THINK_START)
+                self._in_think = True
+                return True
+            if THINK_START.startswith(tag):
+                return False
+        elif char == "{":
+            self._start = self._pos
+            self._depth = 0
+            return True
+        self._pos += 1
+        return True
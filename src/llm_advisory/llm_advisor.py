@@ -1,8 +1,12 @@
+from collections import OrderedDict
+from contextlib import closing
 from logging import getLogger
-from typing import TypeVar
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, TypeVar
 
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage, AIMessage
+from langchain_core.messages import BaseMessage, AIMessage, SystemMessage
 from langchain_core.prompts import (
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
@@ -13,17 +17,29 @@ from llm_advisory.pydantic_models import (
     LLMAdvisorState,
     LLMAdvisorSignal,
     LLMAdvisorMessagesInput,
+    LLMAdvisorPromptLayout,
     LLMAdvisorUpdateStateData,
+    LLMAdvisoryPriority,
 )
+from llm_advisory.llm_advisory_governor import LLMAdvisoryGovernor, estimate_tokens
 from llm_advisory.helper.llm_prompt import (
     generate_description_from_pydantic_model,
     compile_data_artefacts,
 )
+from llm_advisory.helper.llm_stream import LLMSignalStreamParser
+from llm_advisory.helper.llm_profiler import LLMPromptProfiler
+from llm_advisory.helper.llm_fingerprint import (
+    fingerprint_data_artefacts,
+    fingerprint_values,
+)
 
 T = TypeVar("T", bound=LLMAdvisorSignal)
 
 logger = getLogger(__name__)
 
+# max number of cached signals per advisor
+SIGNAL_CACHE_SIZE = 128
+
 
 class LLMAdvisor:
     """LLM Advisor generic implementation"""
@@ -41,9 +57,19 @@ class LLMAdvisor:
     def __init__(
         self,
         messages_input_type: type[LLMAdvisorMessagesInput] = LLMAdvisorMessagesInput,
+        signal_cache_max_age: float | None = None,
+        signal_cache_float_precision: int = 6,
     ):
         # set the advisor settings
         self.advisor_name: str = self.__class__.__name__
+        # signals are reused for equal data and prompts up to max age in seconds,
+        # the data is compared by its canonical form, None disables the cache
+        self.signal_cache_max_age: float | None = signal_cache_max_age
+        self.signal_cache_float_precision: int = signal_cache_float_precision
+        self._signal_cache: OrderedDict[str, tuple[float, LLMAdvisorSignal]] = (
+            OrderedDict()
+        )
+        self._signal_cache_lock = Lock()
         self.advisor_messages_input: LLMAdvisorMessagesInput = messages_input_type()
         self.advisor_system_prompt: str = (
             self.advisor_messages_input.get_system_prompt_template()
@@ -51,6 +77,13 @@ class LLMAdvisor:
         self.advisor_human_prompt: str = (
             self.advisor_messages_input.get_human_prompt_template()
         )
+        # templates for the cache friendly prompt layout
+        self.advisor_prefix_prompt: str = (
+            self.advisor_messages_input.get_prefix_prompt_template()
+        )
+        self.advisor_suffix_prompt: str = (
+            self.advisor_messages_input.get_suffix_prompt_template()
+        )
         # message input controls state update values to use
         # by setting a value, a system prompt will be added
         self.advisor_messages_input.advisor_instructions = self.advisor_instructions
@@ -64,52 +97,75 @@ class LLMAdvisor:
         self, state: LLMAdvisorUpdateStateData
     ) -> LLMAdvisorUpdateStateData:
         """Default callback method for invoke"""
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(state.data)
-        self._update_state(state=state)
+        state = self._get_state(state)
+        messages_input = self.advisor_messages_input.model_copy()
+        messages_input.advisor_prompt = state.messages[0].content
+        # data compiled once for all advisors by the advisory, if available
+        compiled_data = state.metadata.get("compiled_data")
+        if compiled_data is None:
+            compiled_data = compile_data_artefacts(state.data)
+        messages_input.advisor_data = compiled_data
+        return self._update_state(state=state, messages_input=messages_input)
+
+    def _get_state(self, state: LLMAdvisorUpdateStateData) -> LLMAdvisorState:
+        """Returns the state as state model, dict states are validated"""
+        if isinstance(state, dict):
+            return self.state_model_type.model_validate(state)
+        return state
 
     def _update_state(
-        self, state: LLMAdvisorUpdateStateData
+        self,
+        state: LLMAdvisorUpdateStateData,
+        messages_input: LLMAdvisorMessagesInput | None = None,
     ) -> LLMAdvisorUpdateStateData:
         """Internal update state method
 
         messages_input:
         - Defaults are set in init, in update_state only changeable data
+        - A copy is used per invocation, so advisors can be invoked concurrently
         - Data needs to be already present, no data will be generated
         - A human prompt will be set if an advisor_prompt is present
         - A description of the returning pydantic model will be always returned
         """
         # prepare messages input values for prompts
-        messages_input = self.advisor_messages_input
+        if messages_input is None:
+            messages_input = self.advisor_messages_input.model_copy()
         messages_input.advisor_signal_json = generate_description_from_pydantic_model(
             self.signal_model_type
         )
-        messages_templates = []
-        # system prompt
-        if self.advisor_messages_input.advisor_instructions:
-            messages_templates.append(
-                SystemMessagePromptTemplate.from_template(
-                    template=self.advisor_system_prompt, name=self.advisor_name
-                )
+        prompt_layout = state.metadata.get(
+            "prompt_layout", LLMAdvisorPromptLayout.DEFAULT
+        )
+        messages = self._create_messages(messages_input, prompt_layout)
+        profiler: LLMPromptProfiler | None = state.metadata.get("profiler")
+        if profiler is not None:
+            profiler.add_prompt(
+                self.advisor_name,
+                self._get_prompt_templates(messages_input, prompt_layout),
+                messages_input,
             )
-        # human prompt
-        if messages_input.advisor_prompt or messages_input.advisor_data:
-            messages_templates.append(
-                HumanMessagePromptTemplate.from_template(
-                    template=self.advisor_human_prompt, name=self.advisor_name
-                )
+        # generated signal or cached signal for equal data and prompts
+        signal_cache_key = self._get_signal_cache_key(state, messages_input)
+        signal = self._get_cached_signal(signal_cache_key)
+        if signal is None:
+            signal, raw = self._generate_signal(
+                state=state,
+                messages=messages,
+                pydantic_model=self.signal_model_type,
+                signal_cache_key=signal_cache_key,
             )
-        template = ChatPromptTemplate.from_messages(messages_templates)
-        messages = template.invoke(messages_input.model_dump()).to_messages()
-        for message in messages:
-            message.name = self.advisor_name
-        # generated signal
-        signal = self._generate_signal(
-            state=state, messages=messages, pydantic_model=self.signal_model_type
-        )
+            # keep the usage and the provider metadata (like the prompt eval
+            # counts and durations of ollama) of the llm response
+            usage_metadata = getattr(raw, "usage_metadata", None)
+            response_metadata = dict(getattr(raw, "response_metadata", None) or {})
+        else:
+            usage_metadata = None
+            response_metadata = {"cached_signal": True}
         advisor_message = AIMessage(
             content=signal.model_dump_json(indent=2),
             name=self.advisor_name,
+            usage_metadata=usage_metadata,
+            response_metadata=response_metadata,
         )
         return {
             "messages": [advisor_message],
@@ -117,18 +173,128 @@ class LLMAdvisor:
             "conversations": {self.advisor_name: ([*messages, advisor_message])},
         }
 
+    def _get_data_fingerprint(self, state: LLMAdvisorState) -> str:
+        """Returns the fingerprint of the data the advisor uses
+
+        The fingerprint of the call data is used if the advisory provides it"""
+        data_fingerprints = state.metadata.get("data_fingerprints") or {}
+        if self.signal_cache_float_precision in data_fingerprints:
+            return data_fingerprints[self.signal_cache_float_precision]
+        return fingerprint_data_artefacts(
+            state.data, float_precision=self.signal_cache_float_precision
+        )
+
+    def _get_signal_cache_key(
+        self, state: LLMAdvisorState, messages_input: LLMAdvisorMessagesInput
+    ) -> str | None:
+        """Returns the signal cache key, None if the signal cache is disabled"""
+        if self.signal_cache_max_age is None:
+            return None
+        llm = state.metadata.get("llm")
+        return fingerprint_values(
+            self._get_data_fingerprint(state),
+            messages_input.advisor_instructions,
+            messages_input.advisor_prompt,
+            messages_input.advisor_signal_json,
+            getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        )
+
+    def _get_cached_signal(self, signal_cache_key: str | None) -> T | None:
+        """Returns a copy of the cached signal if not older than max age"""
+        if signal_cache_key is None:
+            return None
+        with self._signal_cache_lock:
+            cached = self._signal_cache.get(signal_cache_key)
+            if cached is None:
+                return None
+            created, signal = cached
+            if monotonic() - created > self.signal_cache_max_age:
+                del self._signal_cache[signal_cache_key]
+                return None
+            self._signal_cache.move_to_end(signal_cache_key)
+            return signal.model_copy(deep=True)
+
+    def _set_cached_signal(self, signal_cache_key: str | None, signal: T):
+        """Caches a signal, the oldest signals are removed"""
+        if signal_cache_key is None:
+            return
+        with self._signal_cache_lock:
+            self._signal_cache[signal_cache_key] = (monotonic(), signal)
+            self._signal_cache.move_to_end(signal_cache_key)
+            while len(self._signal_cache) > SIGNAL_CACHE_SIZE:
+                self._signal_cache.popitem(last=False)
+
+    def _get_prompt_templates(
+        self,
+        messages_input: LLMAdvisorMessagesInput,
+        prompt_layout: LLMAdvisorPromptLayout = LLMAdvisorPromptLayout.DEFAULT,
+    ) -> list[tuple[str, str]]:
+        """Returns the message type and template of the prompt messages
+
+        DEFAULT: system prompt with instructions, human prompt with prompt and data
+        CACHE_FRIENDLY: unnamed system prompt with the shared data as prefix,
+        human prompt with the advisor specific instructions and prompt
+        """
+        templates = []
+        if prompt_layout == LLMAdvisorPromptLayout.CACHE_FRIENDLY:
+            templates.append(("system", self.advisor_prefix_prompt))
+            if messages_input.advisor_instructions or messages_input.advisor_prompt:
+                templates.append(("human", self.advisor_suffix_prompt))
+        else:
+            # system prompt
+            if messages_input.advisor_instructions:
+                templates.append(("system", self.advisor_system_prompt))
+            # human prompt
+            if messages_input.advisor_prompt or messages_input.advisor_data:
+                templates.append(("human", self.advisor_human_prompt))
+        return templates
+
+    def _create_messages(
+        self,
+        messages_input: LLMAdvisorMessagesInput,
+        prompt_layout: LLMAdvisorPromptLayout = LLMAdvisorPromptLayout.DEFAULT,
+    ) -> list[BaseMessage]:
+        """Creates the prompt messages for the given layout"""
+        messages_templates = []
+        for message_type, template in self._get_prompt_templates(
+            messages_input, prompt_layout
+        ):
+            if message_type == "system":
+                messages_templates.append(
+                    SystemMessagePromptTemplate.from_template(template=template)
+                )
+            else:
+                messages_templates.append(
+                    HumanMessagePromptTemplate.from_template(template=template)
+                )
+        template = ChatPromptTemplate.from_messages(messages_templates)
+        messages = template.invoke(messages_input.model_dump()).to_messages()
+        for message in messages:
+            # the shared prefix is kept equal for all advisors
+            if prompt_layout == LLMAdvisorPromptLayout.CACHE_FRIENDLY and isinstance(
+                message, SystemMessage
+            ):
+                continue
+            message.name = self.advisor_name
+        return messages
+
     def _generate_signal(
         self,
         state: LLMAdvisorState,
         messages: list[BaseMessage],
         pydantic_model: type[T],
-    ) -> T:
+        signal_cache_key: str | None = None,
+    ) -> tuple[T, BaseMessage | None]:
+        """Generates a signal, returns the signal and the raw llm message
+
+        Generated signals are cached with the signal cache key"""
         try:
-            signal = self._invoke_llm_model(
+            signal, raw = self._invoke_llm_model(
                 state=state,
                 messages=messages,
                 pydantic_model=pydantic_model,
             )
+            self._set_cached_signal(signal_cache_key, signal)
         except ValueError as e:
             logger.error("Error generating signal: %s", e)
             signal = pydantic_model(
@@ -136,24 +302,89 @@ class LLMAdvisor:
                 confidence=0,
                 reasoning=f"Error generating: {e}",
             )
-        return signal
+            raw = None
+        return signal, raw
 
     def _invoke_llm_model(
         self,
         state: LLMAdvisorState,
         messages: list[BaseMessage],
         pydantic_model: type[T],
-    ) -> T:
+    ) -> tuple[T, BaseMessage | None]:
         llm: BaseChatModel = state.metadata.get("llm")
         if llm is None:
             raise ValueError("llm not found in state metadata")
+        if state.metadata.get("streaming"):
+            return self._invoke_llm_model_streaming(
+                state=state,
+                messages=messages,
+                pydantic_model=pydantic_model,
+            )
         structured_llm = llm.with_structured_output(
             schema=pydantic_model,
             include_raw=True,
             method="json_mode",
         )
-        result = structured_llm.invoke(messages)
+        result = self._invoke_governed(
+            state, messages, lambda: structured_llm.invoke(messages)
+        )
         if result["parsed"] is None:
             logger.error("%s no signal generated", self.advisor_name)
             raise ValueError(result)
-        return result["parsed"]
+        return result["parsed"], result["raw"]
+
+    def _invoke_llm_model_streaming(
+        self,
+        state: LLMAdvisorState,
+        messages: list[BaseMessage],
+        pydantic_model: type[T],
+    ) -> tuple[T, BaseMessage | None]:
+        """Streams the response and stops as soon as the signal is complete
+
+        The json object is parsed while streaming, text before it like the
+        reasoning of reasoning models is skipped. A stream ending before the
+        object is complete (like a response cut off by the token limit) is
+        an error."""
+        llm: BaseChatModel = state.metadata["llm"]
+
+        def invoke() -> dict[str, Any]:
+            parser = LLMSignalStreamParser()
+            raw = None
+            with closing(llm.stream(messages)) as stream:
+                for chunk in stream:
+                    raw = chunk if raw is None else raw + chunk
+                    if parser.feed(str(chunk.content)) is not None:
+                        break
+            return {"raw": raw, "parsed": parser.result}
+
+        result = self._invoke_governed(state, messages, invoke)
+        if result["parsed"] is None:
+            logger.error("%s no complete signal generated", self.advisor_name)
+            raise ValueError(result)
+        signal = pydantic_model.model_validate(result["parsed"])
+        return signal, result["raw"]
+
+    def _invoke_governed(
+        self,
+        state: LLMAdvisorState,
+        messages: list[BaseMessage],
+        invoke: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Invokes the llm when admitted by the governor in state metadata"""
+        governor: LLMAdvisoryGovernor | None = state.metadata.get("governor")
+        if governor is None:
+            return invoke()
+        tokens = estimate_tokens(messages)
+        governor.acquire(
+            tokens=tokens,
+            priority=state.metadata.get("priority", LLMAdvisoryPriority.INTERACTIVE),
+        )
+        used_tokens = None
+        try:
+            result = invoke()
+            usage_metadata = getattr(result.get("raw"), "usage_metadata", None)
+            if usage_metadata:
+                used_tokens = usage_metadata["total_tokens"]
+            return result
+        finally:
+            governor.release(tokens=tokens, used_tokens=used_tokens)
@@ -1,18 +1,37 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
 from langchain_core.messages import HumanMessage
 from langgraph.graph import END, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from llm_advisory.pydantic_models import (
     LLMAdvisorState,
+    LLMAdvisorPromptLayout,
+    LLMAdvisoryPriority,
     LLMAdvisorDataArtefact,
     LLMAdvisoryResponse,
 )
 from llm_advisory.llm_advisor import LLMAdvisor
 from llm_advisory.llm_model_provider import LLMModelProvider
-from llm_advisory.state_advisors import AdvisoryAdvisor
+from llm_advisory.llm_advisory_governor import LLMAdvisoryGovernor
+from llm_advisory.llm_advisory_store import LLMAdvisoryStore
+from llm_advisory.state_advisors import AdvisoryAdvisor, SpeculativeAdvisoryAdvisor
+from llm_advisory.helper.llm_prompt import (
+    compile_data_artefacts,
+    generate_description_from_pydantic_model,
+)
+from llm_advisory.helper.llm_profiler import LLMPromptProfiler
+from llm_advisory.helper.llm_fingerprint import (
+    fingerprint_data_artefacts,
+    fingerprint_values,
+)
 
 
 DEFAULT_PROMPT = "Make an advise based on the provided data:\n"
+# float precision of the data fingerprint of stored responses
+STORE_FLOAT_PRECISION = 6
 
 
 class LLMAdvisory:
@@ -31,10 +50,26 @@ class LLMAdvisory:
             LLMAdvisoryResponse
         ] = LLMAdvisoryResponse,
         max_concurrency: int | None = None,
+        prompt_layout: LLMAdvisorPromptLayout = LLMAdvisorPromptLayout.DEFAULT,
+        max_cached_workflows: int = 16,
+        streaming: bool = False,
+        store: LLMAdvisoryStore | None = None,
+        store_max_age: float | None = None,
+        speculative_fraction: float | None = None,
     ):
         if len(advisors) == 0:
             raise ValueError("At least one advisor needs to be provided.")
         self.advisors = advisors
+        # compiled workflows by panel signature (lru)
+        self.max_cached_workflows: int = max_cached_workflows
+        self._workflows: OrderedDict[tuple[str, ...], CompiledStateGraph] = (
+            OrderedDict()
+        )
+        self._workflows_lock = Lock()
+        # registry of advisors which can be selected for a panel by name
+        self.advisor_registry: dict[str, LLMAdvisor] = {}
+        for advisor in advisors:
+            self.register_advisor(advisor)
         self.advisors_before = advisors_before
         self.advisors_after = advisors_after
         self.all_advisors = advisors + (advisors_before or []) + (advisors_after or [])
@@ -49,24 +84,126 @@ class LLMAdvisory:
             advisory_response_pydantic_model
         )
         self.advisor_prompt: str = DEFAULT_PROMPT
+        self.model_name: str = model_name
+        # responses are stored, repeated requests are served from the store
+        # with responses up to max age in seconds, None disables serving
+        self.store: LLMAdvisoryStore | None = store
+        self.store_max_age: float | None = store_max_age
+        # the llm is created first, it validates the model config
+        llm = self.model_provider.get_llm_model(model_name, model_config or {})
+        # process wide governor for the provider, model and account
+        self.governor: LLMAdvisoryGovernor = LLMAdvisoryGovernor.get(
+            self.model_provider.value, model_name, model_config
+        )
         self.metadata: dict = {
-            "llm": self.model_provider.get_llm_model(model_name, model_config or {})
+            "llm": llm,
+            "prompt_layout": prompt_layout,
+            "governor": self.governor,
+            # stream responses and stop when the signal is complete
+            "streaming": streaming,
         }
         self.max_concurrency: int | None = max_concurrency
+        # fraction of the panel to start a provisional advise with, None
+        # waits for all advisors
+        self.speculative_fraction: float | None = speculative_fraction
+
+    def register_advisor(self, advisor: LLMAdvisor, replace: bool = True):
+        """Registers an advisor to be used in panels
+
+        An advisor with the same name is replaced and the workflows using it
+        are invalidated. If replace is False, an equal registered advisor is
+        kept and a different advisor with the same name raises a ValueError"""
+        name = advisor.advisor_name
+        if name == AdvisoryAdvisor.__name__:
+            raise ValueError(f"Advisor name '{name}' is reserved.")
+        with self._workflows_lock:
+            registered = self.advisor_registry.get(name)
+            if registered is advisor:
+                return
+            if registered is not None and not replace:
+                equal = type(registered) is type(advisor) and (
+                    self._get_advisor_key(registered) == self._get_advisor_key(advisor)
+                )
+                if not equal:
+                    raise ValueError(
+                        f"Advisor '{name}' is already registered with other"
+                        " instructions or signal model, use register_advisor"
+                        " to replace it."
+                    )
+                return
+            self.advisor_registry[name] = advisor
+            for panel_signature in [p for p in self._workflows if name in p]:
+                del self._workflows[panel_signature]
 
     def get_advisory(
-        self, message: str = "", input_data: list[LLMAdvisorDataArtefact] | None = None
+        self,
+        message: str = "",
+        input_data: list[LLMAdvisorDataArtefact] | None = None,
+        compiled_data: str | None = None,
+        priority: LLMAdvisoryPriority = LLMAdvisoryPriority.INTERACTIVE,
+        panel: list[str | LLMAdvisor] | None = None,
+        timestamp: datetime | None = None,
+        profiler: LLMPromptProfiler | None = None,
+        data_fingerprints: dict[int, str] | None = None,
     ) -> LLMAdvisoryResponse:
-        """Returns a advisory based on the used advisors"""
+        """Returns a advisory based on the used advisors
+
+        The input data is compiled once for all advisors, already compiled
+        data can be provided with compiled_data. Fingerprints of the input
+        data by float precision (see get_data_fingerprint_precisions) can be
+        provided with data_fingerprints. The priority is used by the governor
+        of the model.
+
+        A panel of registered advisor names or advisors can be selected per
+        call, advisors are registered when used. An equal advisor which is
+        already registered is used instead, a different advisor with the same
+        name raises a ValueError. The advisors provided when creating the
+        advisory are used by default.
+
+        If a store is used, the response is stored with the timestamp. With a
+        store max age, a stored response for the same request and settings
+        is returned without invoking the advisors, marked with from_store.
+
+        A profiler collects the prompt sizes of all advisors of the call."""
         initial_message = message
         if initial_message == "":
             initial_message = self.advisor_prompt
-        graph = self._create_workflow_for_advise()
+        panel_signature = self._get_panel_signature(panel)
+        data_fingerprints = self._get_data_fingerprints(
+            input_data,
+            compiled_data,
+            self._get_data_fingerprint_precisions(panel_signature),
+            data_fingerprints,
+        )
+        if self.store is not None:
+            data_fingerprint = data_fingerprints[STORE_FLOAT_PRECISION]
+            request_key = self._get_request_key(
+                initial_message, data_fingerprint, panel_signature
+            )
+            if self.store_max_age is not None:
+                response = self.store.get_response(
+                    request_key,
+                    self.advisory_response_pydantic_model,
+                    max_age=self.store_max_age,
+                )
+                if response is not None:
+                    return response.model_copy(update={"from_store": True})
+        graph = self._get_workflow_for_panel(panel_signature)
         input_state = self.advisory_state_pydantic_model(
             messages=[
                 HumanMessage(content=initial_message, name=self.__class__.__name__)
             ],
-            metadata=self.metadata,
+            metadata={
+                **self.metadata,
+                "compiled_data": (
+                    compiled_data
+                    if compiled_data is not None
+                    else compile_data_artefacts(input_data or [])
+                ),
+                "data_fingerprints": data_fingerprints,
+                "priority": priority,
+                "profiler": profiler,
+            },
             data=input_data or [],
         )
         state_dict = graph.invoke(
@@ -77,15 +214,187 @@ class LLMAdvisory:
             advise = state.signals[self.advisory_advisor.advisor_name]
         else:
             advise = self.advisory_advisor.signal_model_type()
-        return self.advisory_response_pydantic_model(state=state, advise=advise)
+        response = self.advisory_response_pydantic_model(
+            state=state,
+            advise=advise,
+            provisional_advise_used=state.metadata.get("provisional_advise_used"),
+        )
+        if self.store is not None:
+            self.store.add_response(
+                response,
+                timestamp=timestamp,
+                request_key=request_key,
+                data_fingerprint=data_fingerprint,
+                model=self._get_model_key(),
+            )
+        return response
+
+    def get_data_fingerprint_precisions(
+        self, panel: list[str | LLMAdvisor] | None = None
+    ) -> set[int]:
+        """Returns the float precisions the input data is fingerprinted with
+
+        These are the precisions of the store and of the advisors with a
+        signal cache, an empty set if no fingerprint is used"""
+        return self._get_data_fingerprint_precisions(self._get_panel_signature(panel))
+
+    def _get_data_fingerprint_precisions(
+        self, panel_signature: tuple[str, ...]
+    ) -> set[int]:
+        precisions = {
+            advisor.signal_cache_float_precision
+            for advisor in (self.advisor_registry[name] for name in panel_signature)
+            if advisor.signal_cache_max_age is not None
+        }
+        if self.store is not None:
+            precisions.add(STORE_FLOAT_PRECISION)
+        return precisions
+
+    def _get_data_fingerprints(
+        self,
+        input_data: list[LLMAdvisorDataArtefact] | None,
+        compiled_data: str | None,
+        precisions: set[int],
+        data_fingerprints: dict[int, str] | None = None,
+    ) -> dict[int, str]:
+        """Returns the fingerprints of the call data by float precision
+
+        Fingerprints provided by the caller are used, only missing precisions
+        are fingerprinted. The fingerprints are passed to the advisors in the
+        state metadata, so the data is fingerprinted once per call"""
+        data_fingerprints = data_fingerprints or {}
+        result = {
+            precision: data_fingerprints[precision]
+            for precision in precisions
+            if precision in data_fingerprints
+        }
+        missing = precisions - set(result)
+        if missing and not input_data and compiled_data is not None:
+            data_fingerprint = fingerprint_values(compiled_data)
+            result.update({precision: data_fingerprint for precision in missing})
+        else:
+            result.update(
+                {
+                    precision: fingerprint_data_artefacts(
+                        input_data or [], float_precision=precision
+                    )
+                    for precision in missing
+                }
+            )
+        return result
+
+    def _get_model_key(self) -> str:
+        """Returns the provider and model name"""
+        return f"{self.model_provider.value}/{self.model_name}"
+
+    def _get_request_key(
+        self, message: str, data_fingerprint: str, panel_signature: tuple[str, ...]
+    ) -> str:
+        """Returns the key of a request for the store
+
+        The prompts and signal models of the advisors and the settings
+        changing the response are part of the key, so changed advisors or
+        settings do not use responses made before"""
+        advisors = [self.advisor_registry[name] for name in panel_signature]
+        return fingerprint_values(
+            message,
+            data_fingerprint,
+            [
+                self._get_advisor_key(advisor)
+                for advisor in [*advisors, self.advisory_advisor]
+            ],
+            self._get_model_key(),
+            self.advisor_prompt,
+            self.metadata["prompt_layout"].name,
+            self.metadata["streaming"],
+            self.speculative_fraction,
+            self.advisory_response_pydantic_model.__qualname__,
+        )
+
+    def _get_advisor_key(self, advisor: LLMAdvisor) -> tuple[str, ...]:
+        """Returns the name, prompts and signal model of an advisor
+
+        The signal model is described like in the prompts, the signal json
+        of the messages input is only set on the per call copies"""
+        messages_input = advisor.advisor_messages_input
+        return (
+            advisor.advisor_name,
+            messages_input.advisor_instructions,
+            messages_input.advisor_prompt,
+            generate_description_from_pydantic_model(advisor.signal_model_type),
+            advisor.signal_model_type.__qualname__,
+        )
+
+    def _get_workflow_for_advise(
+        self, panel: list[str | LLMAdvisor] | None = None
+    ) -> CompiledStateGraph:
+        """Returns the cached workflow for a panel"""
+        return self._get_workflow_for_panel(self._get_panel_signature(panel))
+
+    def _get_workflow_for_panel(
+        self, panel_signature: tuple[str, ...]
+    ) -> CompiledStateGraph:
+        """Returns the cached workflow for a panel signature"""
+        with self._workflows_lock:
+            if panel_signature in self._workflows:
+                self._workflows.move_to_end(panel_signature)
+                return self._workflows[panel_signature]
+            advisors = [self.advisor_registry[name] for name in panel_signature]
+        graph = self._create_workflow_for_advise(advisors)
+        with self._workflows_lock:
+            # not cached if an advisor was replaced while creating the workflow
+            if all(
+                self.advisor_registry.get(name) is advisor
+                for name, advisor in zip(panel_signature, advisors)
+            ):
+                self._workflows[panel_signature] = graph
+                while len(self._workflows) > self.max_cached_workflows:
+                    self._workflows.popitem(last=False)
+        return graph
+
+    def _get_panel_signature(
+        self, panel: list[str | LLMAdvisor] | None = None
+    ) -> tuple[str, ...]:
+        """Returns the sorted advisor names of a panel
+
+        Advisors in the panel are registered if no advisor with their name is
+        registered, else the equal registered advisor is used"""
+        if panel is None:
+            panel = self.advisors
+        if len(panel) == 0:
+            raise ValueError("At least one advisor needs to be in the panel.")
+        panel_names = []
+        for advisor in panel:
+            if isinstance(advisor, LLMAdvisor):
+                self.register_advisor(advisor, replace=False)
+                advisor = advisor.advisor_name
+            elif advisor not in self.advisor_registry:
+                raise ValueError(f"Advisor '{advisor}' is not registered.")
+            panel_names.append(advisor)
+        return tuple(sorted(set(panel_names)))
 
-    def _create_workflow_for_advise(self) -> CompiledStateGraph:
+    def _create_workflow_for_advise(
+        self, advisors: list[LLMAdvisor] | None = None
+    ) -> CompiledStateGraph:
         graph = StateGraph(self.advisory_state_pydantic_model)
         graph.add_node("entry_node", lambda _: {}).set_entry_point("entry_node")
+        if self.speculative_fraction is not None:
+            # the advisors are invoked by the speculative advisory advisor
+            speculative_advisor = SpeculativeAdvisoryAdvisor(
+                advisors or self.advisors,
+                speculative_fraction=self.speculative_fraction,
+                max_workers=self.max_concurrency,
+            )
+            graph.add_node(
+                speculative_advisor.advisor_name, speculative_advisor.update_state
+            )
+            graph.add_edge("entry_node", speculative_advisor.advisor_name)
+            graph.add_edge(speculative_advisor.advisor_name, END)
+            return graph.compile()
         graph.add_node(
             self.advisory_advisor.advisor_name, self.advisory_advisor.update_state
         )
-        for advisor in self.advisors:
+        for advisor in advisors or self.advisors:
             name = advisor.advisor_name
             graph.add_node(name, advisor.update_state)
             graph.add_edge("entry_node", name)
@@ -0,0 +1,196 @@
+from heapq import heapify, heappop, heappush
+from itertools import count
+from threading import Condition, Lock
+from time import monotonic
+
+from langchain_core.messages import BaseMessage
+
+from llm_advisory.llm_model_provider import LLMModelProvider
+from llm_advisory.pydantic_models import (
+    LLMAdvisoryPriority,
+    LLMAdvisoryPriorityStats,
+    LLMAdvisoryGovernorStats,
+)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimates the tokens of a text (about 4 characters per token)"""
+    return len(text) // 4
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Estimates the tokens of messages (about 4 characters per token)"""
+    return sum(len(str(message.content)) for message in messages) // 4
+
+
+class LLMAdvisoryGovernor:
+    """Rate limit and concurrency governor
+
+    One governor exists per provider, model and account (the ollama server or
+    open ai api key of the model config) in a process and is shared by all
+    advisories using this model. Requests are admitted when a concurrency
+    slot is free and the request and token buckets (refilled per minute) allow
+    it. Waiting requests are admitted by priority and in order of arrival.
+
+    Limits are set with configure, without limits requests pass directly."""
+
+    _governors: dict[tuple[str, str, str], "LLMAdvisoryGovernor"] = {}
+    _governors_lock = Lock()
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ):
+        self._condition = Condition()
+        self._sequence = count()
+        self._waiters: list[tuple[int, int]] = []
+        self._active = 0
+        self._stats: dict[LLMAdvisoryPriority, LLMAdvisoryPriorityStats] = {
+            priority: LLMAdvisoryPriorityStats() for priority in LLMAdvisoryPriority
+        }
+        self.set_limits(max_concurrency, requests_per_minute, tokens_per_minute)
+
+    @classmethod
+    def get(
+        cls,
+        model_provider_name: str,
+        model_name: str,
+        model_config: dict[str, str] | None = None,
+    ) -> "LLMAdvisoryGovernor":
+        """Returns the governor for a provider, model and account"""
+        model_provider = LLMModelProvider.get_by_name(model_provider_name)
+        key = (
+            model_provider.value,
+            model_name,
+            model_provider.get_account(model_config),
+        )
+        with cls._governors_lock:
+            if key not in cls._governors:
+                cls._governors[key] = cls()
+            return cls._governors[key]
+
+    @classmethod
+    def configure(
+        cls,
+        model_provider_name: str,
+        model_name: str,
+        max_concurrency: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        model_config: dict[str, str] | None = None,
+    ) -> "LLMAdvisoryGovernor":
+        """Sets the limits of the governor for a provider, model and account"""
+        governor = cls.get(model_provider_name, model_name, model_config)
+        governor.set_limits(max_concurrency, requests_per_minute, tokens_per_minute)
+        return governor
+
+    def set_limits(
+        self,
+        max_concurrency: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ):
+        """Sets the limits, None disables a limit"""
+        with self._condition:
+            self.max_concurrency = max_concurrency
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            # buckets start full
+            self._request_bucket = float(requests_per_minute or 0)
+            self._token_bucket = float(tokens_per_minute or 0)
+            self._updated = monotonic()
+            self._condition.notify_all()
+
+    def acquire(
+        self,
+        tokens: int = 0,
+        priority: LLMAdvisoryPriority = LLMAdvisoryPriority.INTERACTIVE,
+    ):
+        """Waits until a request with the estimated tokens is admitted"""
+        start = monotonic()
+        with self._condition:
+            entry = (priority.value, next(self._sequence))
+            heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == entry:
+                        timeout = self._get_wait_time(tokens)
+                        if timeout == 0:
+                            break
+                    self._condition.wait(timeout=timeout)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapify(self._waiters)
+                self._condition.notify_all()
+                raise
+            heappop(self._waiters)
+            self._active += 1
+            if self.requests_per_minute:
+                self._request_bucket -= 1
+            if self.tokens_per_minute:
+                self._token_bucket -= tokens
+            wait_time = monotonic() - start
+            stats = self._stats[priority]
+            stats.requests += 1
+            stats.wait_time_total += wait_time
+            stats.wait_time_max = max(stats.wait_time_max, wait_time)
+            # the next waiter may be admitted too
+            self._condition.notify_all()
+
+    def release(self, tokens: int = 0, used_tokens: int | None = None):
+        """Releases an admitted request
+
+        The token bucket is corrected with the used tokens if available"""
+        with self._condition:
+            self._active -= 1
+            if self.tokens_per_minute and used_tokens is not None:
+                self._token_bucket -= used_tokens - tokens
+            self._condition.notify_all()
+
+    def get_stats(self) -> LLMAdvisoryGovernorStats:
+        """Returns the current queue depth and wait time stats"""
+        with self._condition:
+            priorities = {}
+            for priority, stats in self._stats.items():
+                priorities[priority.name] = stats.model_copy(
+                    update={
+                        "queue_depth": sum(
+                            1 for value, _ in self._waiters if value == priority.value
+                        )
+                    }
+                )
+            return LLMAdvisoryGovernorStats(
+                active=self._active,
+                queue_depth=len(self._waiters),
+                priorities=priorities,
+            )
+
+    def _get_wait_time(self, tokens: int) -> float | None:
+        """Returns the time to wait until a request can be admitted
+
+        0 if it can be admitted, None to wait for a release"""
+        if self.max_concurrency and self._active >= self.max_concurrency:
+            return None
+        now = monotonic()
+        elapsed, self._updated = now - self._updated, now
+        wait_time = 0.0
+        if self.requests_per_minute:
+            rate = self.requests_per_minute / 60
+            self._request_bucket = min(
+                self._request_bucket + elapsed * rate, self.requests_per_minute
+            )
+            if self._request_bucket < 1:
+                wait_time = max(wait_time, (1 - self._request_bucket) / rate)
+        if self.tokens_per_minute:
+            rate = self.tokens_per_minute / 60
+            self._token_bucket = min(
+                self._token_bucket + elapsed * rate, self.tokens_per_minute
+            )
+            # requests larger than the bucket wait for a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+            if self._token_bucket < needed:
+                wait_time = max(wait_time, (needed - self._token_bucket) / rate)
+        return wait_time
@@ -0,0 +1,104 @@
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.context import BaseContext
+
+from llm_advisory.llm_advisory import LLMAdvisory
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisoryRequest,
+    LLMAdvisoryResponse,
+)
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.helper.llm_fingerprint import fingerprint_data_artefacts
+
+
+def _compile_data_artefacts(
+    payload: bytes, precisions: set[int]
+) -> tuple[str, dict[int, str]]:
+    """Compiles and fingerprints the pickled dumped data artefacts in a worker
+
+    The values were validated when the artefacts were created, so the
+    artefacts are constructed without validation. The fingerprints are
+    created for the float precisions used by the advisory"""
+    data_artefacts = [
+        LLMAdvisorDataArtefact.from_trusted(**values)
+        for values in pickle.loads(payload)
+    ]
+    data_fingerprints = {
+        precision: fingerprint_data_artefacts(data_artefacts, float_precision=precision)
+        for precision in precisions
+    }
+    return compile_data_artefacts(data_artefacts), data_fingerprints
+
+
+class LLMAdvisoryProcessRunner:
+    """Process runner for advisories
+
+    The data artefacts of a batch of requests are compiled in a process pool,
+    so the cpu bound compilation scales with the available cores. The compiled
+    data is passed to the advisory which is invoked in a thread pool, since the
+    llm requests are io bound. The data fingerprints used by the store and
+    the signal caches are created in the process pool too.
+
+    The artefacts are sent to the workers as dumped values instead of pydantic
+    models, which are expensive to pickle. The values are pickled once and
+    submitted as bytes, only the compiled strings are sent back."""
+
+    def __init__(
+        self,
+        advisory: LLMAdvisory,
+        max_workers: int | None = None,
+        max_threads: int | None = None,
+        mp_context: BaseContext | None = None,
+    ):
+        self.advisory: LLMAdvisory = advisory
+        self.process_pool: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        )
+        self.thread_pool: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_threads
+        )
+
+    def __enter__(self) -> "LLMAdvisoryProcessRunner":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Shuts down the process and thread pools"""
+        self.thread_pool.shutdown()
+        self.process_pool.shutdown()
+
+    def get_advisories(
+        self, requests: list[LLMAdvisoryRequest]
+    ) -> list[LLMAdvisoryResponse]:
+        """Returns the advisories for a batch of requests in request order"""
+        precisions = self.advisory.get_data_fingerprint_precisions()
+        compile_futures = [
+            self._submit_compile(request, precisions) for request in requests
+        ]
+        advisory_futures = [
+            self.thread_pool.submit(self._get_advisory, request, compile_future)
+            for request, compile_future in zip(requests, compile_futures)
+        ]
+        return [future.result() for future in advisory_futures]
+
+    def _submit_compile(
+        self, request: LLMAdvisoryRequest, precisions: set[int]
+    ) -> Future:
+        input_values = [artefact.model_dump() for artefact in request.input_data]
+        payload = pickle.dumps(input_values, protocol=pickle.HIGHEST_PROTOCOL)
+        return self.process_pool.submit(_compile_data_artefacts, payload, precisions)
+
+    def _get_advisory(
+        self, request: LLMAdvisoryRequest, compile_future: Future
+    ) -> LLMAdvisoryResponse:
+        compiled_data, data_fingerprints = compile_future.result()
+        return self.advisory.get_advisory(
+            message=request.message,
+            input_data=request.input_data,
+            compiled_data=compiled_data,
+            timestamp=request.timestamp,
+            data_fingerprints=data_fingerprints,
+        )
@@ -0,0 +1,287 @@
+import sqlite3
+from datetime import datetime, timezone
+from json import dumps, loads
+from threading import Lock
+from time import time
+from typing import Any
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from pandas import DataFrame, read_sql_query, to_datetime
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisoryResponse,
+    LLMAdvisoryStoreRecord,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    created REAL NOT NULL,
+    request_key TEXT,
+    data_fingerprint TEXT,
+    model TEXT,
+    signal TEXT,
+    confidence REAL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_timestamp ON responses (timestamp);
+CREATE INDEX IF NOT EXISTS responses_request_key ON responses (request_key);
+CREATE INDEX IF NOT EXISTS responses_data_fingerprint
+    ON responses (data_fingerprint);
+CREATE INDEX IF NOT EXISTS responses_model ON responses (model, timestamp);
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    response_id INTEGER NOT NULL REFERENCES responses (id),
+    timestamp REAL NOT NULL,
+    advisor TEXT NOT NULL,
+    data_fingerprint TEXT,
+    model TEXT,
+    signal TEXT,
+    confidence REAL,
+    reasoning TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_advisor ON signals (advisor, timestamp);
+CREATE INDEX IF NOT EXISTS signals_timestamp ON signals (timestamp);
+CREATE INDEX IF NOT EXISTS signals_data_fingerprint ON signals (data_fingerprint);
+CREATE INDEX IF NOT EXISTS signals_model ON signals (model, timestamp);
+"""
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Returns the epoch timestamp of a datetime, naive datetimes are utc"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def dump_response(response: LLMAdvisoryResponse) -> str:
+    """Returns a response as json"""
+    return dumps(response_to_dict(response))
+
+
+def response_to_dict(response: LLMAdvisoryResponse) -> dict[str, Any]:
+    """Returns a response as json serializable dict
+
+    Messages are serialized with their type, the state metadata is not
+    included since it contains runtime objects like the llm"""
+    state = response.state
+    values = response.model_dump(mode="json", exclude={"state"})
+    values["state"] = {
+        "messages": messages_to_dict(state.messages),
+        "conversations": {
+            name: messages_to_dict(messages)
+            for name, messages in state.conversations.items()
+        },
+        "signals": {
+            name: signal.model_dump(mode="json")
+            for name, signal in state.signals.items()
+        },
+        "data": [artefact.model_dump(mode="json") for artefact in state.data],
+    }
+    return values
+
+
+def load_response(
+    value: str,
+    response_model_type: type[LLMAdvisoryResponse] = LLMAdvisoryResponse,
+) -> LLMAdvisoryResponse:
+    """Returns a response from json created with dump_response"""
+    values = loads(value)
+    state = values["state"]
+    state["messages"] = messages_from_dict(state["messages"])
+    state["conversations"] = {
+        name: messages_from_dict(messages)
+        for name, messages in state["conversations"].items()
+    }
+    return response_model_type.model_validate(values)
+
+
+class LLMAdvisoryStore:
+    """Append only SQLite store for advisory responses
+
+    Responses are stored with their timestamp, creation time, request key,
+    data fingerprint and model, the signals of all advisors are stored in a separate indexed
+    table for range scans in backtests.
+
+    The store can be shared by threads, writes are serialized."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path: str = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._connection.commit()
+
+    def __enter__(self) -> "LLMAdvisoryStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Closes the connection to the database"""
+        with self._lock:
+            self._connection.close()
+
+    def add_response(
+        self,
+        response: LLMAdvisoryResponse,
+        timestamp: datetime | None = None,
+        request_key: str | None = None,
+        data_fingerprint: str | None = None,
+        model: str | None = None,
+    ):
+        """Adds a response, the timestamp defaults to now"""
+        self.add_records(
+            [
+                LLMAdvisoryStoreRecord(
+                    response=response,
+                    timestamp=timestamp or datetime.now(timezone.utc),
+                    request_key=request_key,
+                    data_fingerprint=data_fingerprint,
+                    model=model,
+                )
+            ]
+        )
+
+    def add_records(self, records: list[LLMAdvisoryStoreRecord]):
+        """Adds records in a single transaction"""
+        rows = []
+        created = time()
+        for record in records:
+            timestamp = _to_timestamp(record.timestamp)
+            advise = record.response.advise
+            rows.append(
+                (
+                    (
+                        timestamp,
+                        created,
+                        record.request_key,
+                        record.data_fingerprint,
+                        record.model,
+                        advise.signal,
+                        advise.confidence,
+                        dump_response(record.response),
+                    ),
+                    [
+                        (
+                            timestamp,
+                            name,
+                            record.data_fingerprint,
+                            record.model,
+                            signal.signal,
+                            signal.confidence,
+                            signal.reasoning,
+                        )
+                        for name, signal in record.response.state.signals.items()
+                    ],
+                )
+            )
+        with self._lock, self._connection:
+            for response_row, signal_rows in rows:
+                cursor = self._connection.execute(
+                    "INSERT INTO responses (timestamp, created, request_key,"
+                    " data_fingerprint, model, signal, confidence, response)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    response_row,
+                )
+                self._connection.executemany(
+                    "INSERT INTO signals (response_id, timestamp, advisor,"
+                    " data_fingerprint, model, signal, confidence, reasoning)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, *row) for row in signal_rows],
+                )
+
+    def get_response(
+        self,
+        request_key: str,
+        response_model_type: type[LLMAdvisoryResponse] = LLMAdvisoryResponse,
+        max_age: float | None = None,
+    ) -> LLMAdvisoryResponse | None:
+        """Returns the latest response for a request key
+
+        With max_age only responses created up to max age seconds ago are
+        returned"""
+        created = time() - max_age if max_age is not None else float("-inf")
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM responses WHERE request_key = ?"
+                " AND created >= ? ORDER BY id DESC LIMIT 1",
+                (request_key, created),
+            ).fetchone()
+        if row is None:
+            return None
+        return load_response(row[0], response_model_type)
+
+    def get_responses(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        model: str | None = None,
+        data_fingerprint: str | None = None,
+        response_model_type: type[LLMAdvisoryResponse] = LLMAdvisoryResponse,
+    ) -> list[LLMAdvisoryResponse]:
+        """Returns the responses in a time range (end excluded) by timestamp"""
+        where, params = self._get_filter(
+            start, end, model=model, data_fingerprint=data_fingerprint
+        )
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT response FROM responses {where} ORDER BY timestamp, id",
+                params,
+            ).fetchall()
+        return [load_response(row[0], response_model_type) for row in rows]
+
+    def get_signals(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        advisor: str | None = None,
+        model: str | None = None,
+        data_fingerprint: str | None = None,
+    ) -> DataFrame:
+        """Returns the signals in a time range (end excluded) as dataframe"""
+        where, params = self._get_filter(
+            start,
+            end,
+            advisor=advisor,
+            model=model,
+            data_fingerprint=data_fingerprint,
+        )
+        with self._lock:
+            df = read_sql_query(
+                "SELECT timestamp, advisor, signal, confidence, reasoning,"
+                f" data_fingerprint, model FROM signals {where}"
+                " ORDER BY timestamp, id",
+                self._connection,
+                params=params,
+            )
+        df["timestamp"] = to_datetime(df["timestamp"], unit="s", utc=True)
+        return df
+
+    def _get_filter(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        **values: Any,
+    ) -> tuple[str, list[Any]]:
+        """Returns the where clause and params for a time range and values"""
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_to_timestamp(start))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(_to_timestamp(end))
+        for column, value in values.items():
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if not conditions:
+            return "", params
+        return "WHERE " + " AND ".join(conditions), params
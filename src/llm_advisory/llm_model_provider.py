@@ -1,4 +1,5 @@
 from enum import Enum
+from hashlib import sha256
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
@@ -63,6 +64,20 @@ class LLMModelProvider(str, Enum):
         else:
             raise ValueError(f"Unsupported LLM Provider {self.__class__.__name__}")
 
+    def get_account(self, model_config: dict[str, str] | None = None) -> str:
+        """Returns the account of a model config
+
+        The account is the server url for ollama and a hash of the api key
+        for open ai, models of different accounts have separate limits"""
+        model_config = model_config or {}
+        if self is LLMModelProvider.OPENAI:
+            api_key = model_config.get("OPENAI_API_KEY") or ""
+            return sha256(api_key.encode()).hexdigest()[:16]
+        elif self is LLMModelProvider.OLLAMA:
+            return model_config.get("OLLAMA_BASE_URL") or "http://localhost:11434"
+        else:
+            raise ValueError(f"Unsupported LLM Provider {self.__class__.__name__}")
+
     def get_model_names_enum(self) -> LLMOpenAIModelNames | LLMOllamaModelNames:
         """Returns the model names enum for current model provider"""
         if self is LLMModelProvider.OPENAI:
@@ -1,10 +1,25 @@
-import operator
 from datetime import datetime
 from enum import Enum
-from typing import Any, Literal, Annotated, TypeAlias, Union
-
-from pydantic import BaseModel, RootModel, Field, field_validator
-from langchain_core.messages import BaseMessage
+from typing import (
+    Any,
+    Literal,
+    Annotated,
+    TypeAlias,
+    Union,
+)
+
+from pydantic import (
+    BaseModel,
+    RootModel,
+    Field,
+    SerializationInfo,
+    SerializerFunctionWrapHandler,
+    field_serializer,
+    field_validator,
+)
+from pydantic_core import to_jsonable_python
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
 
 
 # type for update_state data
@@ -18,6 +33,21 @@ def merge_dicts(a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
     return {**a, **b}
 
 
+def update_dict(a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+    """Updates dict a in place with dict b
+
+    Used as state reducer, the accumulated dict is owned by the graph channel, so
+    merging in place keeps a fan-in of n advisors linear instead of quadratic"""
+    a.update(b)
+    return a
+
+
+def extend_list(a: list[Any], b: list[Any]) -> list[Any]:
+    """Extends list a in place with list b (see update_dict)"""
+    a.extend(b)
+    return a
+
+
 class LLMAdvisorDataArtefactOutputMode(Enum):
     """Output mode for data artefacts"""
 
@@ -25,6 +55,23 @@ class LLMAdvisorDataArtefactOutputMode(Enum):
     MARKDOWN_TABLE = 2
 
 
+class LLMAdvisorPromptLayout(Enum):
+    """Layout of the advisor prompt messages"""
+
+    # instructions in system prompt, prompt and data in human prompt
+    DEFAULT = 1
+    # shared data first and equal for all advisors, advisor specific parts last,
+    # so provider side prompt caching can reuse the prefix for the whole panel
+    CACHE_FRIENDLY = 2
+
+
+class LLMAdvisoryPriority(Enum):
+    """Priority of an advisory for the governor, lower values go first"""
+
+    INTERACTIVE = 1
+    BATCH = 2
+
+
 class LLMAdvisorDataArtefactValue(RootModel):
     root: Union[
         LLMAdvisorDataArtefactAtomic,
@@ -51,20 +98,86 @@ class LLMAdvisorDataArtefact(BaseModel):
         description="Output mode for data",
     )
 
+    @classmethod
+    def from_trusted(
+        cls,
+        artefact: Any,
+        description: str = "",
+        output_mode: LLMAdvisorDataArtefactOutputMode = (
+            LLMAdvisorDataArtefactOutputMode.JSON_OBJECT
+        ),
+        unwrap: bool = False,
+    ) -> "LLMAdvisorDataArtefact":
+        """Creates a data artefact from already validated data
+
+        The data is neither validated nor walked and kept as is, a data
+        artefact given as data is replaced by its data. Use only for data
+        validated upstream, which must not contain nested data artefacts.
+        With unwrap, nested artefacts are replaced by their plain data, which
+        walks all containers of the data."""
+        while isinstance(artefact, LLMAdvisorDataArtefact):
+            artefact = artefact.artefact
+        if unwrap:
+            artefact = _unwrap_artefact(artefact, plain=True)
+        return cls.model_construct(
+            description=description,
+            artefact=artefact,
+            output_mode=output_mode,
+        )
+
     @field_validator("artefact", mode="before")
     @classmethod
     def validate_artefact(cls, v):
-        def _unwrap_artefact(val):
-            if isinstance(val, LLMAdvisorDataArtefact):
-                return _unwrap_artefact(val.artefact)
-            elif isinstance(val, list):
-                return [_unwrap_artefact(item) for item in val]
-            elif isinstance(val, dict):
-                return {k: _unwrap_artefact(subval) for k, subval in val.items()}
-            return val
-
         return _unwrap_artefact(v)
 
+    @field_serializer("artefact", mode="wrap")
+    def serialize_artefact(
+        self,
+        value: Any,
+        handler: SerializerFunctionWrapHandler,
+        info: SerializationInfo,
+    ) -> Any:
+        # trusted artefacts contain plain values
+        if isinstance(value, LLMAdvisorDataArtefactValue):
+            return handler(value)
+        if info.mode_is_json():
+            return to_jsonable_python(value)
+        return value
+
+
+def _unwrap_artefact(value: Any, plain: bool = False) -> Any:
+    """Replaces nested data artefacts with their data
+
+    Containers are only copied if they contain nested artefacts, data
+    without nested artefacts is returned as is. With plain, the data of
+    nested artefacts is returned as plain values."""
+    if isinstance(value, LLMAdvisorDataArtefact):
+        value = value.artefact
+        if plain and isinstance(value, LLMAdvisorDataArtefactValue):
+            value = value.model_dump()
+        return _unwrap_artefact(value, plain)
+    if isinstance(value, list):
+        result = value
+        for i, item in enumerate(value):
+            if isinstance(item, (list, dict, LLMAdvisorDataArtefact)):
+                unwrapped = _unwrap_artefact(item, plain)
+                if unwrapped is not item:
+                    if result is value:
+                        result = list(value)
+                    result[i] = unwrapped
+        return result
+    if isinstance(value, dict):
+        result = value
+        for key, item in value.items():
+            if isinstance(item, (list, dict, LLMAdvisorDataArtefact)):
+                unwrapped = _unwrap_artefact(item, plain)
+                if unwrapped is not item:
+                    if result is value:
+                        result = dict(value)
+                    result[key] = unwrapped
+        return result
+    return value
+
 
 class LLMAdvisorMessagesInput(BaseModel):
     """Advisor input
@@ -82,6 +195,12 @@ class LLMAdvisorMessagesInput(BaseModel):
     def get_human_prompt_template(self):
         return "{advisor_prompt}\n\n{advisor_data}\n\n{advisor_signal_json}"
 
+    def get_prefix_prompt_template(self):
+        return "{advisor_data}\n\n{advisor_signal_json}"
+
+    def get_suffix_prompt_template(self):
+        return "{advisor_instructions}\n\n{advisor_prompt}"
+
 
 class LLMAdvisorSignal(BaseModel):
     """Default advisor signal"""
@@ -124,25 +243,152 @@ class LLMAdvisorAdvise(LLMAdvisorSignal):
 class LLMAdvisorState(BaseModel):
     """Advisor state"""
 
-    messages: Annotated[list[BaseMessage], operator.add] = Field(
+    messages: Annotated[list[BaseMessage], extend_list] = Field(
         default_factory=list, description="Messages from all advisors"
     )
-    conversations: Annotated[dict[str, list[BaseMessage]], merge_dicts] = Field(
+    conversations: Annotated[dict[str, list[BaseMessage]], update_dict] = Field(
         default_factory=dict, description="Conversations from all advisors"
     )
-    signals: Annotated[dict[str, LLMAdvisorSignal], merge_dicts] = Field(
+    signals: Annotated[dict[str, LLMAdvisorSignal], update_dict] = Field(
         default_factory=dict, description="Signals from all advisors"
     )
-    data: Annotated[list[LLMAdvisorDataArtefact], operator.add] = Field(
+    data: Annotated[list[LLMAdvisorDataArtefact], extend_list] = Field(
         default_factory=list, description="Data for all advisors"
     )
-    metadata: Annotated[dict[str, Any], merge_dicts] = Field(
+    metadata: Annotated[dict[str, Any], update_dict] = Field(
         default_factory=dict, description="Metadata for all advisors"
     )
 
 
+class LLMAdvisoryRequest(BaseModel):
+    """Advisory request"""
+
+    message: str = Field(default="", description="Message for the advisors")
+    input_data: list[LLMAdvisorDataArtefact] = Field(
+        default_factory=list, description="Data for all advisors"
+    )
+    timestamp: datetime | None = Field(
+        default=None, description="Timestamp to store the response with"
+    )
+
+
+class LLMAdvisoryJob(LLMAdvisoryRequest):
+    """Advisory job for the worker"""
+
+    id: str | int | None = Field(default=None, description="Id of the job")
+    advisory: str | None = Field(
+        default=None, description="Name of the advisory, None for the default"
+    )
+    panel: list[str] | None = Field(
+        default=None, description="Names of the advisors to use"
+    )
+    priority: LLMAdvisoryPriority = Field(
+        default=LLMAdvisoryPriority.INTERACTIVE, description="Priority of the job"
+    )
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def validate_priority(cls, v):
+        if isinstance(v, str):
+            try:
+                return LLMAdvisoryPriority[v.upper()]
+            except KeyError:
+                raise ValueError(f"Unknown priority '{v}'") from None
+        return v
+
+
 class LLMAdvisoryResponse(BaseModel):
     """Advisory response"""
 
     state: LLMAdvisorState
     advise: LLMAdvisorAdvise
+    provisional_advise_used: bool | None = Field(
+        default=None,
+        description="If the provisional advise of a speculative advisory was used",
+    )
+    from_store: bool = Field(
+        default=False, description="If the response was served from the store"
+    )
+
+    def get_usage_metadata(self) -> dict[str, UsageMetadata]:
+        """Returns the usage metadata of the llm calls by advisor name"""
+        return {
+            message.name: message.usage_metadata
+            for message in self.state.messages
+            if isinstance(message, AIMessage) and message.usage_metadata
+        }
+
+    def get_response_metadata(self) -> dict[str, dict[str, Any]]:
+        """Returns the provider response metadata of the llm calls by advisor
+        name, like the prompt eval counts and durations reported by ollama"""
+        return {
+            message.name: message.response_metadata
+            for message in self.state.messages
+            if isinstance(message, AIMessage) and message.response_metadata
+        }
+
+
+class LLMAdvisoryStoreRecord(BaseModel):
+    """Advisory store record"""
+
+    response: LLMAdvisoryResponse
+    timestamp: datetime = Field(description="Timestamp of the response")
+    request_key: str | None = Field(
+        default=None, description="Key of the request the response was made for"
+    )
+    data_fingerprint: str | None = Field(
+        default=None, description="Fingerprint of the data"
+    )
+    model: str | None = Field(default=None, description="Provider and model name")
+
+
+class LLMPromptSectionProfile(BaseModel):
+    """Size of a section of a rendered advisor prompt"""
+
+    advisor: str = Field(description="Name of the advisor")
+    message: int = Field(description="Index of the prompt message")
+    message_type: str = Field(description="Type of the prompt message")
+    section: str = Field(description="Section of the prompt message")
+    chars: int = Field(default=0, description="Number of characters")
+    tokens: int = Field(default=0, description="Estimated number of tokens")
+    duplicate_of: str | None = Field(
+        default=None, description="First section with the same content"
+    )
+
+
+class LLMAdvisoryWorkerStats(BaseModel):
+    """Worker stats"""
+
+    jobs: int = Field(default=0, description="Finished jobs")
+    errors: int = Field(default=0, description="Failed jobs")
+    running: int = Field(default=0, description="Running jobs")
+    uptime: float = Field(default=0.0, description="Uptime in s")
+    throughput: float = Field(default=0.0, description="Finished jobs per s")
+    latency_avg: float = Field(default=0.0, description="Average latency in s")
+    latency_p50: float = Field(default=0.0, description="Median latency in s")
+    latency_p95: float = Field(default=0.0, description="95th percentile latency")
+    latency_max: float = Field(default=0.0, description="Max latency in s")
+
+
+class LLMAdvisoryPriorityStats(BaseModel):
+    """Governor stats for a priority"""
+
+    queue_depth: int = Field(default=0, description="Waiting requests")
+    requests: int = Field(default=0, description="Admitted requests")
+    wait_time_total: float = Field(default=0.0, description="Total wait time in s")
+    wait_time_max: float = Field(default=0.0, description="Max wait time in s")
+
+    @property
+    def wait_time_avg(self) -> float:
+        """Average wait time in s"""
+        return self.wait_time_total / self.requests if self.requests else 0.0
+
+
+class LLMAdvisoryGovernorStats(BaseModel):
+    """Governor stats"""
+
+    active: int = Field(default=0, description="Running requests")
+    queue_depth: int = Field(default=0, description="Waiting requests")
+    priorities: dict[str, LLMAdvisoryPriorityStats] = Field(
+        default_factory=dict, description="Stats by priority name"
+    )
@@ -1,5 +1,7 @@
 from .advisory_advisor import AdvisoryAdvisor
+from .speculative_advisory_advisor import SpeculativeAdvisoryAdvisor
 
 __all__ = [
     "AdvisoryAdvisor",
+    "SpeculativeAdvisoryAdvisor",
 ]
@@ -1,3 +1,5 @@
+from json import dumps
+
 from llm_advisory.llm_advisor import LLMAdvisor
 from llm_advisory.pydantic_models import (
     LLMAdvisorDataArtefact,
@@ -5,11 +7,20 @@ from llm_advisory.pydantic_models import (
     LLMAdvisorState,
     LLMAdvisorUpdateStateData,
 )
+from llm_advisory.helper.llm_fingerprint import (
+    canonicalize_artefact_value,
+    fingerprint_data_artefacts,
+    fingerprint_values,
+)
 from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.helper.llm_signals import LLMSignalRecord, get_signal_records
 
 
 ADVISOR_INSTRUCTIONS = "You are the last advisor who creates an advice based on the signals of other advisors."
 ADVISOR_PROMPT = "Create your advise based on the signals below:"
+SIGNAL_DATA_DESCRIPTION = (
+    "The signals in the json data below are generated by the advisors"
+)
 
 
 class AdvisoryAdvisor(LLMAdvisor):
@@ -22,23 +33,49 @@ class AdvisoryAdvisor(LLMAdvisor):
     def update_state(
         self, state: LLMAdvisorUpdateStateData
     ) -> LLMAdvisorUpdateStateData:
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_signal_data(state)
+        state = self._get_state(state)
+        messages_input = self.advisor_messages_input.model_copy()
+        if self._has_custom_signal_data():
+            messages_input.advisor_data = compile_data_artefacts(
+                self._get_signal_data(state)
+            )
+        else:
+            messages_input.advisor_data = self._compile_signal_data(
+                get_signal_records(state)
+            )
+        return super()._update_state(state, messages_input=messages_input)
+
+    def _has_custom_signal_data(self) -> bool:
+        """Returns if a subclass overrides _get_signal_data
+
+        The signal data of subclasses is compiled as data artefact, else the
+        signals are compiled directly"""
+        return type(self)._get_signal_data is not AdvisoryAdvisor._get_signal_data
+
+    def _get_data_fingerprint(self, state: LLMAdvisorState) -> str:
+        if self._has_custom_signal_data():
+            return fingerprint_data_artefacts(
+                self._get_signal_data(state),
+                float_precision=self.signal_cache_float_precision,
+            )
+        signals = [record.to_dict() for record in get_signal_records(state)]
+        return fingerprint_values(
+            canonicalize_artefact_value(signals, self.signal_cache_float_precision)
         )
-        return super()._update_state(state)
+
+    def _compile_signal_data(self, records: list[LLMSignalRecord]) -> str:
+        """Compiles the signals like a json object data artefact
+
+        The signals are read directly, without validating an artefact and
+        converting it with pandas"""
+        signals = dumps([record.to_dict() for record in records], indent=2)
+        return f"{SIGNAL_DATA_DESCRIPTION}\n```\n{signals}\n```"
 
     def _get_signal_data(self, state: LLMAdvisorState) -> LLMAdvisorDataArtefact:
-        signals = []
-        for advisor_name, signal in state.signals.items():
-            signals.append(
-                {
-                    "name": advisor_name,
-                    "signal": signal.signal,
-                    "confidence": signal.confidence,
-                    "reasoning": signal.reasoning,
-                }
-            )
+        """Returns the signals as data artefact
+
+        Subclasses can override it to customize the data of the advise"""
         return LLMAdvisorDataArtefact(
-            description="The signals in the json data below are generated by the advisors",
-            artefact=signals,
+            description=SIGNAL_DATA_DESCRIPTION,
+            artefact=[record.to_dict() for record in get_signal_records(state)],
         )
@@ -0,0 +1,125 @@
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from math import ceil
+from typing import Any
+
+from llm_advisory.llm_advisor import LLMAdvisor
+from llm_advisory.pydantic_models import (
+    LLMAdvisorSignal,
+    LLMAdvisorState,
+    LLMAdvisorUpdateStateData,
+)
+from llm_advisory.state_advisors.advisory_advisor import AdvisoryAdvisor
+
+
+class SpeculativeAdvisoryAdvisor(AdvisoryAdvisor):
+    """State advisor for a speculative advisory
+
+    Invokes the advisors of the panel itself. When the fraction of advisors
+    has reported, a provisional advise is created from their signals while
+    the other advisors are still running. The provisional advise is used if
+    all late signals agree with the majority of the early signals, else the
+    advise is created again from all signals. A rejected provisional advise
+    is not waited for, it finishes in the background.
+
+    The state metadata contains provisional_advise_used."""
+
+    def __init__(
+        self,
+        advisors: list[LLMAdvisor],
+        speculative_fraction: float = 0.5,
+        max_workers: int | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        # uses the name of the advisory advisor, so the advise is found
+        self.advisor_name = AdvisoryAdvisor.__name__
+        self.advisors = advisors
+        self.speculative_fraction = speculative_fraction
+        self.max_workers = max_workers
+
+    def update_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        state = self._get_state(state)
+        updates: list[dict[str, Any]] = []
+        provisional: Future | None = None
+        provisional_signals: dict[str, LLMAdvisorSignal] = {}
+        threshold = max(1, ceil(len(self.advisors) * self.speculative_fraction))
+        advise_executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.max_workers or len(self.advisors)
+            ) as executor:
+                futures = [
+                    executor.submit(advisor.update_state, state)
+                    for advisor in self.advisors
+                ]
+                for future in as_completed(futures):
+                    updates.append(future.result())
+                    pending = len(self.advisors) - len(updates)
+                    if provisional is None and len(updates) >= threshold and pending:
+                        provisional_signals = self._get_signals(updates)
+                        provisional = advise_executor.submit(
+                            super().update_state,
+                            self._get_signals_state(state, provisional_signals),
+                        )
+            signals = self._get_signals(updates)
+            advise_update = None
+            if provisional is not None:
+                late_signals = [
+                    signal
+                    for name, signal in signals.items()
+                    if name not in provisional_signals
+                ]
+                if self._signals_agree(provisional_signals, late_signals):
+                    advise_update = provisional.result()
+            provisional_advise_used = advise_update is not None
+            if advise_update is None:
+                advise_update = super().update_state(
+                    self._get_signals_state(state, signals)
+                )
+        finally:
+            # a rejected provisional advise is not waited for
+            advise_executor.shutdown(wait=False, cancel_futures=True)
+        return {
+            "messages": [
+                message for update in updates for message in update["messages"]
+            ]
+            + advise_update["messages"],
+            "signals": {**signals, **advise_update["signals"]},
+            "conversations": {
+                name: conversation
+                for update in [*updates, advise_update]
+                for name, conversation in update["conversations"].items()
+            },
+            "metadata": {"provisional_advise_used": provisional_advise_used},
+        }
+
+    def _get_signals(
+        self, updates: list[dict[str, Any]]
+    ) -> dict[str, LLMAdvisorSignal]:
+        """Returns the signals of advisor updates"""
+        return {
+            name: signal
+            for update in updates
+            for name, signal in update["signals"].items()
+        }
+
+    def _get_signals_state(
+        self, state: LLMAdvisorState, signals: dict[str, LLMAdvisorSignal]
+    ) -> LLMAdvisorState:
+        """Returns a copy of the state with the signals"""
+        return state.model_copy(update={"signals": {**state.signals, **signals}})
+
+    def _signals_agree(
+        self,
+        signals: dict[str, LLMAdvisorSignal],
+        late_signals: list[LLMAdvisorSignal],
+    ) -> bool:
+        """Returns if the late signals agree with the majority of the signals"""
+        counts = Counter(signal.signal for signal in signals.values()).most_common(2)
+        if len(counts) > 1 and counts[0][1] == counts[1][1]:
+            # no majority
+            return False
+        return all(signal.signal == counts[0][0] for signal in late_signals)
@@ -0,0 +1,300 @@
+"""Advisory worker service
+
+Keeps advisories warm and runs jobs from a JSONL stream (stdin) or a Unix
+socket. Every input line is a job (see LLMAdvisoryJob), every output line
+is the result of a job with its id, latency and the response or error.
+Results are written as soon as a job finished, so the order may differ
+from the input. The line {"command": "stats"} returns the worker stats.
+
+The advisories are created by a factory, a callable given as module:name
+returning a LLMAdvisory or a dict of named advisories. The module is imported
+from the app dir, which is the current directory by default:
+
+    llm-advisory-worker --factory my_advisories:create_advisories
+"""
+
+import errno
+import os
+import socket
+import stat
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib import import_module
+from json import dumps, loads
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Any, Callable, TextIO
+
+from llm_advisory.llm_advisory import LLMAdvisory
+from llm_advisory.llm_advisory_store import response_to_dict
+from llm_advisory.pydantic_models import LLMAdvisoryJob, LLMAdvisoryWorkerStats
+
+DEFAULT_ADVISORY = "default"
+# number of latencies kept for the percentiles
+LATENCY_WINDOW = 10_000
+
+
+class LLMAdvisoryWorker:
+    """Worker running advisory jobs with bounded concurrency
+
+    At most max_concurrency jobs run at the same time, reading jobs waits
+    while max_pending jobs are not finished."""
+
+    def __init__(
+        self,
+        advisories: LLMAdvisory | dict[str, LLMAdvisory],
+        max_concurrency: int = 4,
+        max_pending: int | None = None,
+    ):
+        if isinstance(advisories, LLMAdvisory):
+            advisories = {DEFAULT_ADVISORY: advisories}
+        if len(advisories) == 0:
+            raise ValueError("At least one advisory needs to be provided.")
+        self.advisories: dict[str, LLMAdvisory] = advisories
+        self.max_concurrency: int = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.max_pending: int = max_pending or max_concurrency * 2
+        self._pending = BoundedSemaphore(self.max_pending)
+        self._stats_lock = Lock()
+        self._started = monotonic()
+        self._jobs = 0
+        self._errors = 0
+        self._running = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def __enter__(self) -> "LLMAdvisoryWorker":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Waits for the running jobs and stops the worker"""
+        self._executor.shutdown(wait=True)
+
+    def run_stream(self, input_stream: TextIO, output_stream: TextIO):
+        """Runs the jobs of a JSONL stream and writes the results to a stream
+
+        Returns when the input stream is closed and all jobs finished"""
+        output_lock = Lock()
+
+        def write(result: dict[str, Any]):
+            with output_lock:
+                output_stream.write(dumps(result) + "\n")
+                output_stream.flush()
+
+        futures = []
+        for line in input_stream:
+            if not line.strip():
+                continue
+            future = self.submit_line(line, write)
+            if future is not None:
+                futures.append(future)
+            if len(futures) > self.max_pending * 2:
+                futures = [f for f in futures if not f.done()]
+        for future in futures:
+            future.result()
+
+    def submit_line(
+        self, line: str, callback: Callable[[dict[str, Any]], None]
+    ) -> Future | None:
+        """Submits a job line, the result is passed to the callback
+
+        Waits while too many jobs are pending"""
+        try:
+            values = loads(line)
+            if isinstance(values, dict) and values.get("command") == "stats":
+                callback({"stats": self.get_stats().model_dump()})
+                return None
+            job = LLMAdvisoryJob.model_validate(values)
+        except ValueError as e:
+            callback({"id": None, "error": f"Invalid job: {e}"})
+            return None
+
+        self._pending.acquire()
+        try:
+            return self._executor.submit(self._run_job, job, callback)
+        except BaseException:
+            self._pending.release()
+            raise
+
+    def serve_socket(self, path: str):
+        """Serves jobs on a Unix socket until interrupted
+
+        Every connection is a JSONL stream of jobs with the results written
+        back to the connection. A stale socket file of a stopped worker is
+        replaced, the socket file is removed on shutdown"""
+        worker = self
+
+        class Handler(StreamRequestHandler):
+            def handle(self):
+                with self.rfile, self.wfile:
+                    input_stream = (line.decode() for line in self.rfile)
+                    worker.run_stream(input_stream, _SocketWriter(self.wfile))
+
+        _remove_stale_socket(path)
+        with ThreadingUnixStreamServer(path, Handler) as server:
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(path)
+
+    def get_stats(self) -> LLMAdvisoryWorkerStats:
+        """Returns the throughput and latency stats"""
+        with self._stats_lock:
+            uptime = monotonic() - self._started
+            latencies = sorted(self._latencies)
+            finished = self._jobs + self._errors
+            return LLMAdvisoryWorkerStats(
+                jobs=self._jobs,
+                errors=self._errors,
+                running=self._running,
+                uptime=uptime,
+                throughput=finished / uptime if uptime else 0.0,
+                latency_avg=self._latency_total / finished if finished else 0.0,
+                latency_p50=_get_percentile(latencies, 0.5),
+                latency_p95=_get_percentile(latencies, 0.95),
+                latency_max=self._latency_max,
+            )
+
+    def _run_job(self, job: LLMAdvisoryJob, callback: Callable[[dict[str, Any]], None]):
+        """Runs a job and passes the result to the callback"""
+        try:
+            callback(self._get_job_result(job))
+        finally:
+            self._pending.release()
+
+    def _get_job_result(self, job: LLMAdvisoryJob) -> dict[str, Any]:
+        """Runs a job and returns the result"""
+        start = monotonic()
+        with self._stats_lock:
+            self._running += 1
+        result: dict[str, Any] = {"id": job.id}
+        try:
+            advisory = self.advisories[job.advisory or next(iter(self.advisories))]
+            response = advisory.get_advisory(
+                message=job.message,
+                input_data=job.input_data,
+                priority=job.priority,
+                panel=job.panel,
+                timestamp=job.timestamp,
+            )
+            result["response"] = response_to_dict(response)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        latency = monotonic() - start
+        result["latency"] = latency
+        with self._stats_lock:
+            self._running -= 1
+            if "error" in result:
+                self._errors += 1
+            else:
+                self._jobs += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            self._latencies.append(latency)
+        return result
+
+
+class _SocketWriter:
+    """Text stream writing to a socket file"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str):
+        self.wfile.write(text.encode())
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def _remove_stale_socket(path: str):
+    """Removes a socket file no server is listening on
+
+    Raises an OSError if a server is still listening on the socket"""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise OSError(errno.EADDRINUSE, f"A worker is already serving on {path}")
+
+
+def _get_percentile(values: list[float], percentile: float) -> float:
+    """Returns the percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * percentile), len(values) - 1)]
+
+
+def load_factory(
+    name: str, app_dir: str | None = None
+) -> Callable[[], LLMAdvisory | dict[str, LLMAdvisory]]:
+    """Returns the factory for a name like module:function
+
+    The app dir is put first on the import path, console scripts only have
+    their bin dir on it and not the current directory"""
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Factory '{name}' needs to be in the form module:name")
+    if app_dir is not None:
+        app_dir = os.path.abspath(app_dir)
+        if app_dir not in sys.path:
+            sys.path.insert(0, app_dir)
+    return getattr(import_module(module_name), attribute)
+
+
+def main(argv: list[str] | None = None):
+    parser = ArgumentParser(description="Runs advisory jobs from stdin or a socket")
+    parser.add_argument(
+        "--factory",
+        required=True,
+        help="module:name of a callable returning the advisories",
+    )
+    parser.add_argument(
+        "--app-dir",
+        default=".",
+        help="directory to import the factory module from, default is the"
+        " current directory",
+    )
+    parser.add_argument(
+        "--socket", help="path of a Unix socket to serve, default is stdin"
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, default=4, help="max number of running jobs"
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=None, help="max number of pending jobs"
+    )
+    args = parser.parse_args(argv)
+    advisories = load_factory(args.factory, app_dir=args.app_dir)()
+    with LLMAdvisoryWorker(
+        advisories,
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending,
+    ) as worker:
+        try:
+            if args.socket:
+                worker.serve_socket(args.socket)
+            else:
+                worker.run_stream(sys.stdin, sys.stdout)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(worker.get_stats().model_dump_json(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
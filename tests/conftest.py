@@ -0,0 +1,36 @@
+from typing import Callable
+
+import pytest
+
+from llm_advisory import LLMAdvisor, LLMAdvisory
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+
+
+@pytest.fixture
+def create_advisory() -> Callable[..., LLMAdvisory]:
+    """Returns a factory for advisories using a fake signal model
+
+    The advisory uses two persona advisors if no advisors are given, other
+    keyword arguments are passed to the advisory."""
+
+    def create(
+        advisors: list[LLMAdvisor] | None = None,
+        llm: LLMFakeSignalModel | None = None,
+        **kwargs,
+    ) -> LLMAdvisory:
+        if advisors is None:
+            advisors = [
+                PersonaAdvisor("Person A", "First test person"),
+                PersonaAdvisor("Person B", "Second test person"),
+            ]
+        advisory = LLMAdvisory(
+            advisors=advisors,
+            model_provider_name="ollama",
+            model_name="gemma3",
+            **kwargs,
+        )
+        advisory.metadata["llm"] = llm or LLMFakeSignalModel()
+        return advisory
+
+    return create
@@ -0,0 +1,65 @@
+import pytest
+
+from llm_advisory.advisors import PersonaAdvisor
+
+
+def test_advisor_panel(create_advisory):
+    advisory = create_advisory()
+    advisory_response = advisory.get_advisory("Test message")
+    assert set(advisory_response.state.signals) == {
+        "PersonaAdvisorPersonA",
+        "PersonaAdvisorPersonB",
+        "AdvisoryAdvisor",
+    }
+
+    advisory_response = advisory.get_advisory(
+        "Test message",
+        panel=["PersonaAdvisorPersonB", PersonaAdvisor("Person C", "Third person")],
+    )
+    assert set(advisory_response.state.signals) == {
+        "PersonaAdvisorPersonB",
+        "PersonaAdvisorPersonC",
+        "AdvisoryAdvisor",
+    }
+    assert "PersonaAdvisorPersonC" in advisory.advisor_registry
+
+    with pytest.raises(ValueError):
+        advisory.get_advisory("Test message", panel=["Unknown"])
+
+
+def test_advisor_panel_workflow_cache(create_advisory):
+    advisory = create_advisory(max_cached_workflows=2)
+    panel_a = ["PersonaAdvisorPersonA"]
+    panel_b = ["PersonaAdvisorPersonB", "PersonaAdvisorPersonA"]
+    workflow_a = advisory._get_workflow_for_advise(panel_a)
+    workflow_b = advisory._get_workflow_for_advise(panel_b)
+
+    assert advisory._get_workflow_for_advise(panel_a) is workflow_a
+    # order of the panel is not relevant
+    assert advisory._get_workflow_for_advise(panel_b[::-1]) is workflow_b
+
+    # least recently used workflow is removed
+    advisory._get_workflow_for_advise(["PersonaAdvisorPersonB"])
+    assert advisory._get_workflow_for_advise(panel_a) is not workflow_a
+
+    # equal advisors in a panel use the registered advisors
+    workflow_b = advisory._get_workflow_for_advise(panel_b)
+    panel_c = [
+        "PersonaAdvisorPersonA",
+        PersonaAdvisor("Person B", "Second test person"),
+    ]
+    assert advisory._get_workflow_for_advise(panel_c) is workflow_b
+
+    # different advisors with a registered name are not silently dropped
+    panel_d = ["PersonaAdvisorPersonA", PersonaAdvisor("Person B", "Other person")]
+    with pytest.raises(ValueError, match="already registered"):
+        advisory._get_workflow_for_advise(panel_d)
+    assert advisory._get_workflow_for_advise(panel_b) is workflow_b
+
+    # replacing an advisor invalidates the workflows using it
+    advisory.register_advisor(PersonaAdvisor("Person B", "Changed test person"))
+    assert advisory._get_workflow_for_advise(panel_b) is not workflow_b
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
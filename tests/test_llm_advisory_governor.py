@@ -0,0 +1,124 @@
+from threading import Thread
+from time import monotonic, sleep
+
+import pytest
+
+from llm_advisory import LLMAdvisory, LLMAdvisoryGovernor
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.pydantic_models import LLMAdvisoryPriority
+
+
+def test_governor_concurrency():
+    governor = LLMAdvisoryGovernor(max_concurrency=2)
+    active = []
+
+    def _run():
+        governor.acquire()
+        active.append(governor.get_stats().active)
+        sleep(0.01)
+        governor.release()
+
+    threads = [Thread(target=_run) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(active) <= 2
+    assert governor.get_stats().priorities["INTERACTIVE"].requests == 10
+
+
+def test_governor_priority():
+    governor = LLMAdvisoryGovernor(max_concurrency=1)
+    admitted = []
+
+    def _run(priority):
+        governor.acquire(priority=priority)
+        admitted.append(priority)
+        governor.release()
+
+    governor.acquire()
+    threads = [
+        Thread(target=_run, args=(LLMAdvisoryPriority.BATCH,)),
+        Thread(target=_run, args=(LLMAdvisoryPriority.INTERACTIVE,)),
+    ]
+    for thread in threads:
+        thread.start()
+        sleep(0.05)
+    stats = governor.get_stats()
+    assert stats.queue_depth == 2
+    assert stats.priorities["BATCH"].queue_depth == 1
+    governor.release()
+    for thread in threads:
+        thread.join()
+
+    assert admitted == [LLMAdvisoryPriority.INTERACTIVE, LLMAdvisoryPriority.BATCH]
+
+
+def test_governor_tokens_per_minute():
+    governor = LLMAdvisoryGovernor(tokens_per_minute=6000)
+    governor.acquire(tokens=6000)
+    governor.release(tokens=6000)
+    start = monotonic()
+    governor.acquire(tokens=50)
+    governor.release(tokens=50)
+
+    assert monotonic() - start >= 0.4
+    assert governor.get_stats().priorities["INTERACTIVE"].wait_time_max >= 0.4
+
+
+def test_advisory_governor(create_advisory):
+    advisory = create_advisory(
+        advisors=[PersonaAdvisor(f"Person {i}", "Test person") for i in range(3)],
+        llm=LLMFakeSignalModel(latency=0.01),
+    )
+    governor = LLMAdvisoryGovernor.configure("ollama", "gemma3", max_concurrency=1)
+    assert advisory.governor is governor
+    try:
+        requests = governor.get_stats().priorities["BATCH"].requests
+        advisory.get_advisory("Test message", priority=LLMAdvisoryPriority.BATCH)
+        stats = governor.get_stats()
+    finally:
+        governor.set_limits()
+
+    assert stats.priorities["BATCH"].requests == requests + 4
+    assert stats.active == 0
+
+
+def test_governor_account():
+    governor = LLMAdvisoryGovernor.get("ollama", "gemma3")
+    assert LLMAdvisoryGovernor.get("Ollama", "gemma3") is governor
+    assert (
+        LLMAdvisoryGovernor.get(
+            "ollama", "gemma3", {"OLLAMA_BASE_URL": "http://localhost:11434"}
+        )
+        is governor
+    )
+    assert (
+        LLMAdvisoryGovernor.get(
+            "ollama", "gemma3", {"OLLAMA_BASE_URL": "http://remote:11434"}
+        )
+        is not governor
+    )
+    assert LLMAdvisoryGovernor.get(
+        "openai", "gpt-4o", {"OPENAI_API_KEY": "key 1"}
+    ) is not LLMAdvisoryGovernor.get("openai", "gpt-4o", {"OPENAI_API_KEY": "key 2"})
+    assert (
+        LLMAdvisoryGovernor.get("ollama", "gemma3", {"OLLAMA_BASE_URL": None})
+        is governor
+    )
+
+
+def test_advisory_missing_api_key():
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        LLMAdvisory(
+            advisors=[PersonaAdvisor("Person A", "Test person")],
+            model_provider_name="openai",
+            model_name="gpt-4o",
+            model_config={"OPENAI_API_KEY": None},
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
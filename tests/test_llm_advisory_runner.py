@@ -0,0 +1,86 @@
+import pytest
+
+from llm_advisory import LLMAdvisoryProcessRunner, LLMAdvisoryStore
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fingerprint import fingerprint_data_artefacts
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+    LLMAdvisoryRequest,
+)
+
+
+def test_process_runner(create_advisory):
+    advisory = create_advisory(
+        advisors=[PersonaAdvisor("Test person", "Test person for using in pytest")]
+    )
+    requests = [
+        LLMAdvisoryRequest(
+            message=f"Test message {i}",
+            input_data=[
+                LLMAdvisorDataArtefact(
+                    description="Test data",
+                    artefact=[{"a": i, "b": j} for j in range(10)],
+                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                )
+            ],
+        )
+        for i in range(4)
+    ]
+    with LLMAdvisoryProcessRunner(advisory, max_workers=2) as runner:
+        advisory_responses = runner.get_advisories(requests)
+
+    assert len(advisory_responses) == len(requests)
+    for request, advisory_response in zip(requests, advisory_responses):
+        assert advisory_response.state.messages[0].content == request.message
+        assert advisory_response.state.metadata[
+            "compiled_data"
+        ] == compile_data_artefacts(request.input_data)
+
+
+def test_process_runner_data_fingerprints(monkeypatch, create_advisory):
+    store = LLMAdvisoryStore()
+    advisory = create_advisory(
+        advisors=[
+            PersonaAdvisor(
+                "Test person",
+                "Test person for using in pytest",
+                signal_cache_max_age=60,
+                signal_cache_float_precision=2,
+            )
+        ],
+        store=store,
+    )
+    request = LLMAdvisoryRequest(
+        message="Test message",
+        input_data=[
+            LLMAdvisorDataArtefact(
+                description="Test data",
+                artefact=[{"a": 1.123, "b": 2}],
+            )
+        ],
+    )
+    expected = {
+        precision: fingerprint_data_artefacts(
+            request.input_data, float_precision=precision
+        )
+        for precision in (2, 6)
+    }
+
+    def fail(*args, **kwargs):
+        raise AssertionError("data fingerprinted outside the process pool")
+
+    # the data is only fingerprinted in the process pool
+    monkeypatch.setattr("llm_advisory.llm_advisory.fingerprint_data_artefacts", fail)
+    monkeypatch.setattr("llm_advisory.llm_advisor.fingerprint_data_artefacts", fail)
+    with LLMAdvisoryProcessRunner(advisory, max_workers=1) as runner:
+        (advisory_response,) = runner.get_advisories([request])
+
+    assert advisory.get_data_fingerprint_precisions() == {2, 6}
+    assert advisory_response.state.metadata["data_fingerprints"] == expected
+    assert len(store.get_signals(data_fingerprint=expected[6])) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
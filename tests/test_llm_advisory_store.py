@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone
+from time import sleep
+
+import pytest
+from pydantic import Field
+
+from llm_advisory import LLMAdvisoryStore
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorPromptLayout,
+    LLMAdvisorSignal,
+    LLMAdvisoryStoreRecord,
+)
+
+
+def _create_signal_model(description: str) -> type[LLMAdvisorSignal]:
+    class Signal(LLMAdvisorSignal):
+        reasoning: str = Field(default="", description=description)
+
+    return Signal
+
+
+def test_advisory_store(tmp_path, create_advisory):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with LLMAdvisoryStore(str(tmp_path / "advisories.db")) as store:
+        advisory = create_advisory(store=store, store_max_age=3600)
+        llm = advisory.metadata["llm"]
+        for i in range(3):
+            input_data = [
+                LLMAdvisorDataArtefact(description="close", artefact=[1.0, 2.0 + i])
+            ]
+            advisory.get_advisory(
+                "Test message",
+                input_data=input_data,
+                timestamp=start + timedelta(hours=i),
+            )
+        # two persona advisors and the advisory advisor
+        assert llm.calls == 9
+
+        # repeated request is served from the store
+        input_data = [LLMAdvisorDataArtefact(description="close", artefact=[1.0, 3.0])]
+        response = advisory.get_advisory("Test message", input_data=input_data)
+        assert llm.calls == 9
+        assert response.from_store
+        assert response.advise.signal == "neutral"
+        assert set(response.state.conversations) == {
+            "PersonaAdvisorPersonA",
+            "PersonaAdvisorPersonB",
+            "AdvisoryAdvisor",
+        }
+        assert response.state.data == input_data
+
+        # a different panel is not served from the store
+        advisory.get_advisory(
+            "Test message",
+            input_data=input_data,
+            panel=["PersonaAdvisorPersonA"],
+        )
+        assert llm.calls == 11
+
+        responses = store.get_responses(start, start + timedelta(hours=2))
+        assert len(responses) == 2
+        signals = store.get_signals(
+            start + timedelta(hours=1),
+            start + timedelta(days=1),
+            advisor="PersonaAdvisorPersonA",
+        )
+        assert len(signals) == 2
+        assert signals["timestamp"].iloc[0] == start + timedelta(hours=1)
+        assert set(signals["model"]) == {"ollama/gemma3"}
+
+
+def test_advisory_store_serving(create_advisory):
+    input_data = [LLMAdvisorDataArtefact(description="close", artefact=[1.0, 2.0])]
+    with LLMAdvisoryStore() as store:
+        # without max age responses are only stored
+        advisory = create_advisory(store=store)
+        llm = advisory.metadata["llm"]
+        response = advisory.get_advisory("Test message", input_data=input_data)
+        advisory.get_advisory("Test message", input_data=input_data)
+        assert llm.calls == 6
+        assert not response.from_store
+
+        advisory = create_advisory(store=store, store_max_age=3600)
+        llm = advisory.metadata["llm"]
+        assert advisory.get_advisory("Test message", input_data=input_data).from_store
+        assert llm.calls == 0
+
+        # other settings are not served from the store
+        for kwargs in (
+            {"streaming": True},
+            {"prompt_layout": LLMAdvisorPromptLayout.CACHE_FRIENDLY},
+        ):
+            advisory = create_advisory(store=store, store_max_age=3600, **kwargs)
+            llm = advisory.metadata["llm"]
+            response = advisory.get_advisory("Test message", input_data=input_data)
+            assert not response.from_store
+            assert llm.calls == 3
+
+        # responses older than the max age are not served
+        advisory = create_advisory(store=store, store_max_age=0)
+        sleep(0.01)
+        advisory.get_advisory("Test message", input_data=input_data)
+        assert advisory.metadata["llm"].calls == 3
+
+
+def test_advisory_store_signal_model(create_advisory):
+    with LLMAdvisoryStore() as store:
+        for description, from_store in (
+            ("Reasoning", False),
+            ("Reasoning", True),
+            ("Short reasoning", False),
+        ):
+            advisor = PersonaAdvisor("Person A", "First test person")
+            # signal models with the same name but other fields
+            advisor.signal_model_type = _create_signal_model(description)
+            advisory = create_advisory(
+                advisors=[advisor], store=store, store_max_age=3600
+            )
+            response = advisory.get_advisory("Test message")
+            assert response.from_store == from_store
+
+
+def test_advisory_store_bulk_write(create_advisory):
+    advisory = create_advisory()
+    response = advisory.get_advisory("Test message")
+    start = datetime(2024, 1, 1)
+    with LLMAdvisoryStore() as store:
+        store.add_records(
+            [
+                LLMAdvisoryStoreRecord(
+                    response=response,
+                    timestamp=start + timedelta(minutes=i),
+                    data_fingerprint=str(i % 2),
+                )
+                for i in range(100)
+            ]
+        )
+        assert len(store.get_responses(data_fingerprint="1")) == 50
+        signals = store.get_signals(end=start + timedelta(minutes=10))
+        assert len(signals) == 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
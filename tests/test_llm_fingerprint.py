@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.helper.llm_fingerprint import fingerprint_data_artefacts
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+
+
+def test_fingerprint_data_artefacts():
+    fingerprint = fingerprint_data_artefacts(
+        LLMAdvisorDataArtefact(
+            description="Bars",
+            artefact=[
+                {"datetime": "2024-01-01 10:00", "close": 1.1, "volume": 10},
+                {"datetime": datetime(2024, 1, 1, 11), "close": 1.2, "volume": 20},
+            ],
+        )
+    )
+    fingerprint_noise = fingerprint_data_artefacts(
+        LLMAdvisorDataArtefact(
+            description="Bars",
+            artefact=[
+                {
+                    "volume": 10,
+                    "close": 1.1000000001,
+                    "datetime": "2024-01-01T10:00:00",
+                },
+                {
+                    "close": 1.2,
+                    "volume": 20,
+                    "datetime": datetime(2024, 1, 1, 11, tzinfo=timezone.utc),
+                },
+            ],
+        )
+    )
+    fingerprint_changed = fingerprint_data_artefacts(
+        LLMAdvisorDataArtefact(
+            description="Bars",
+            artefact=[
+                {"datetime": "2024-01-01 10:00", "close": 1.1, "volume": 10},
+                {"datetime": "2024-01-01 11:00", "close": 1.3, "volume": 20},
+            ],
+        )
+    )
+
+    assert fingerprint == fingerprint_noise
+    assert fingerprint != fingerprint_changed
+
+
+@pytest.mark.parametrize("signal_cache_max_age, calls", [(60, 3), (0, 4), (None, 4)])
+def test_persona_advisor_signal_cache(create_advisory, signal_cache_max_age, calls):
+    llm = LLMFakeSignalModel()
+    advisory = create_advisory(
+        advisors=[
+            PersonaAdvisor(
+                "Test person",
+                "Test person for using in pytest",
+                signal_cache_max_age=signal_cache_max_age,
+            )
+        ],
+        llm=llm,
+    )
+    advisory_responses = [
+        advisory.get_advisory(
+            "Test initial message",
+            [LLMAdvisorDataArtefact(description="Test", artefact=[{"a": value}])],
+        )
+        for value in (1.0, 1.0000000001)
+    ]
+
+    # the advisory advisor is always invoked
+    assert llm.calls == calls
+    cached_message = advisory_responses[1].state.conversations[
+        "PersonaAdvisorTestperson"
+    ][-1]
+    assert cached_message.response_metadata.get("cached_signal", False) == (calls == 3)
+
+
+def test_advisory_data_fingerprints(create_advisory):
+    llm = LLMFakeSignalModel()
+    advisory = create_advisory(
+        advisors=[
+            PersonaAdvisor(
+                "Test person",
+                "Test person for using in pytest",
+                signal_cache_max_age=60,
+                signal_cache_float_precision=2,
+            )
+        ],
+        llm=llm,
+    )
+    input_data = [LLMAdvisorDataArtefact(description="Test", artefact=[{"a": 1.0}])]
+    advisory_response = advisory.get_advisory("Test message", input_data)
+
+    assert advisory_response.state.metadata["data_fingerprints"] == {
+        2: fingerprint_data_artefacts(input_data, float_precision=2)
+    }
+
+    # data only provided as compiled data is part of the cache key
+    for compiled_data in ("Test data 1", "Test data 2", "Test data 1"):
+        advisory.get_advisory("Test message", compiled_data=compiled_data)
+
+    # the advisory advisor is always invoked, the last persona signal is cached
+    assert llm.calls == 2 + 4 + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,51 @@
+import pytest
+from pandas import isna
+
+from llm_advisory.helper.llm_profiler import LLMPromptProfiler
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+
+
+def test_prompt_profiler(create_advisory):
+    advisory = create_advisory()
+    profiler = LLMPromptProfiler()
+    advisory_response = advisory.get_advisory(
+        "Test message",
+        input_data=[LLMAdvisorDataArtefact(description="Close", artefact=[1.0, 2.0])],
+        profiler=profiler,
+    )
+    df = profiler.get_dataframe()
+    assert set(df["advisor"]) == {
+        "PersonaAdvisorPersonA",
+        "PersonaAdvisorPersonB",
+        "AdvisoryAdvisor",
+    }
+
+    # the sections add up to the rendered messages
+    for advisor, conversation in advisory_response.state.conversations.items():
+        for i, message in enumerate(conversation[:-1]):
+            sections = df[(df["advisor"] == advisor) & (df["message"] == i)]
+            assert sections["chars"].sum() == len(message.content)
+
+    sections = df.set_index(["advisor", "message", "section"])["duplicate_of"]
+    # the signal description is in the system and human prompt
+    assert sections["PersonaAdvisorPersonA", 1, "advisor_signal_json"].endswith(
+        "/0/advisor_signal_json"
+    )
+    # the data is sent to every advisor, the first one is not a duplicate
+    assert {
+        sections["PersonaAdvisorPersonA", 1, "advisor_data"],
+        sections["PersonaAdvisorPersonB", 1, "advisor_data"],
+    } & {
+        "PersonaAdvisorPersonA/1/advisor_data",
+        "PersonaAdvisorPersonB/1/advisor_data",
+    }
+    assert isna(sections["PersonaAdvisorPersonA", 0, "advisor_instructions"])
+
+    report = profiler.get_report()
+    assert report.startswith("# Prompt profile")
+    assert "Duplicated tokens: " in report
+    assert "advisor_signal_json" in report
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,6 +1,11 @@
+from datetime import datetime
+
 import pytest
 
-from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+)
 from llm_advisory.helper.llm_prompt import compile_data_artefacts
 
 
@@ -21,5 +26,73 @@ def test_generate_data_artefact():
     assert response != ""
 
 
+@pytest.mark.parametrize(
+    "datetimes",
+    [
+        ["2024-01-02 10:00:00", "2024-01-01 10:00:00", "2024-01-01 11:00:00"],
+        [datetime(2024, 1, 2, 10), datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 11)],
+        [1704189600, 1704103200, 1704106800],
+    ],
+)
+def test_generate_data_artefact_datetime(datetimes):
+    data_artefact = LLMAdvisorDataArtefact(
+        artefact=[{"value": i, "datetime": dt} for i, dt in enumerate(datetimes)],
+        output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+    )
+    expected = (
+        "```\n"
+        "| datetime         |   value |\n"
+        "|:-----------------|--------:|\n"
+        "| 2024-01-01 10:00 |       1 |\n"
+        "| 2024-01-01 11:00 |       2 |\n"
+        "| 2024-01-02 10:00 |       0 |\n"
+        "```"
+    )
+
+    # repeated compilation uses the cached formatted values
+    for _ in range(2):
+        response = compile_data_artefacts(
+            data_artefacts=data_artefact, datetime_format="%Y-%m-%d %H:%M"
+        )
+        assert response == expected
+
+
+def test_trusted_data_artefact():
+    bars = [
+        {
+            "datetime": datetime(2024, 1, 1, i),
+            "close": LLMAdvisorDataArtefact(artefact=1.0 + i),
+            "volume": i,
+        }
+        for i in range(3)
+    ]
+    for output_mode in LLMAdvisorDataArtefactOutputMode:
+        validated = LLMAdvisorDataArtefact(
+            description="Bars", artefact=bars, output_mode=output_mode
+        )
+        trusted = LLMAdvisorDataArtefact.from_trusted(
+            bars, description="Bars", output_mode=output_mode, unwrap=True
+        )
+        assert compile_data_artefacts(trusted) == compile_data_artefacts(validated)
+        assert trusted.model_dump() == validated.model_dump()
+        assert trusted.model_dump_json() == validated.model_dump_json()
+
+
+def test_unwrap_data_artefact_copy_on_write():
+    bars = [{"close": 1.0, "tags": ["a", "b"]}, {"close": 2.0, "tags": []}]
+    # trusted data is kept as is
+    assert LLMAdvisorDataArtefact.from_trusted(bars).artefact is bars
+    artefact = LLMAdvisorDataArtefact.from_trusted(bars)
+    assert LLMAdvisorDataArtefact.from_trusted(artefact).artefact is bars
+    # data without nested artefacts is not copied
+    assert LLMAdvisorDataArtefact.from_trusted(bars, unwrap=True).artefact is bars
+    nested = LLMAdvisorDataArtefact(artefact=[1, 2])
+    data = [bars, nested]
+    trusted = LLMAdvisorDataArtefact.from_trusted(data, unwrap=True)
+    assert trusted.artefact == [bars, [1, 2]]
+    assert trusted.artefact[0] is bars
+    assert data[1] is nested
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
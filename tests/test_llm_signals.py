@@ -0,0 +1,97 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.helper.llm_signals import (
+    LLMSignalRecord,
+    get_signal_records,
+    responses_to_array,
+    responses_to_dataframe,
+)
+from llm_advisory.pydantic_models import (
+    LLMAdvisorAdvise,
+    LLMAdvisorDataArtefact,
+    LLMAdvisorSignal,
+    LLMAdvisorState,
+    LLMAdvisoryResponse,
+)
+from llm_advisory.state_advisors import AdvisoryAdvisor
+
+
+def _create_state(count: int = 3) -> LLMAdvisorState:
+    signals = ["positive", "negative", "neutral"]
+    return LLMAdvisorState(
+        signals={
+            f"Advisor{i}": LLMAdvisorSignal(
+                signal=signals[i % 3],
+                confidence=i / 7,
+                reasoning=f'Reasoning {i} with "quotes", ümlauts and\nlines',
+            )
+            for i in range(count)
+        }
+    )
+
+
+def test_signal_records():
+    records = get_signal_records(_create_state())
+    assert records[1] == LLMSignalRecord(
+        "Advisor1", "negative", 1 / 7, records[1].reasoning
+    )
+    assert records[0].to_dict()["name"] == "Advisor0"
+    with pytest.raises(AttributeError):
+        records[0].value = 1
+
+
+def test_compile_signal_data():
+    advisor = AdvisoryAdvisor()
+    for count in [0, 1, 5]:
+        state = _create_state(count)
+        expected = compile_data_artefacts(advisor._get_signal_data(state))
+        assert advisor._compile_signal_data(get_signal_records(state)) == expected
+
+
+def test_custom_signal_data():
+    class CustomAdvisoryAdvisor(AdvisoryAdvisor):
+        def _get_signal_data(self, state):
+            return LLMAdvisorDataArtefact(
+                description="Custom signals", artefact=list(state.signals)
+            )
+
+    advisor = CustomAdvisoryAdvisor()
+    llm = LLMFakeSignalModel()
+    update = advisor.update_state(
+        _create_state().model_copy(
+            update={
+                "messages": [HumanMessage(content="Test message")],
+                "metadata": {"llm": llm},
+            }
+        )
+    )
+    prompt = "".join(
+        str(message.content)
+        for message in update["conversations"][advisor.advisor_name][:-1]
+    )
+    assert "Custom signals" in prompt
+    assert "Reasoning 0" not in prompt
+
+
+def test_responses_export():
+    responses = [
+        LLMAdvisoryResponse(state=_create_state(count), advise=LLMAdvisorAdvise())
+        for count in [2, 3]
+    ]
+    values = responses_to_array(responses)
+    assert len(values) == 5
+    assert values["response"].tolist() == [0, 0, 1, 1, 1]
+    assert values["signal"].tolist()[:3] == ["positive", "negative", "positive"]
+    assert values["confidence"][4] == pytest.approx(2 / 7)
+
+    df = responses_to_dataframe(responses)
+    assert df["advisor"].tolist() == values["advisor"].tolist()
+    assert df["confidence"].dtype == "float64"
+    assert len(responses_to_dataframe([])) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,83 @@
+import pytest
+
+from llm_advisory.advisors import DefaultAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.helper.llm_stream import LLMSignalStreamParser
+
+
+def _feed_chunks(parser: LLMSignalStreamParser, text: str, size: int = 3):
+    for i in range(0, len(text), size):
+        result = parser.feed(text[i : i + size])
+        if result is not None:
+            return result, text[i + size :]
+    return None, ""
+
+
+def test_stream_parser():
+    text = (
+        "<think>Maybe {signal: positive}? </think>Here is the signal:\n"
+        '```json\n{"signal": "negative", "confidence": 0.7, '
+        '"reasoning": "Falling {prices} and \\"weak\\" volume"}\n```'
+        " More text generated after the signal."
+    )
+    parser = LLMSignalStreamParser()
+    result, remaining = _feed_chunks(parser, text)
+    assert parser.done
+    assert result == {
+        "signal": "negative",
+        "confidence": 0.7,
+        "reasoning": 'Falling {prices} and "weak" volume',
+    }
+    assert "More text generated" in remaining
+
+
+def test_stream_parser_invalid_object():
+    parser = LLMSignalStreamParser()
+    result, _ = _feed_chunks(parser, 'Use {signal} as key: {"signal": "neutral"}')
+    assert result == {"signal": "neutral"}
+
+
+def test_stream_parser_partial_reasoning():
+    parser = LLMSignalStreamParser()
+    assert parser.partial is None
+    parser.feed('{"signal": "positive", "reasoning": "Rising')
+    assert parser.partial == {"signal": "positive", "reasoning": "Rising"}
+    parser.feed(" prices")
+    assert parser.partial["reasoning"] == "Rising prices"
+    assert not parser.done
+
+
+def test_streaming_advisor(create_advisory):
+    response = (
+        "<think>The data looks good</think>"
+        '{"signal": "positive", "confidence": 0.8, "reasoning": "Rising prices"}'
+        + " tail" * 100
+    )
+    llm = LLMFakeSignalModel(responses=[response])
+    advisory = create_advisory(advisors=[DefaultAdvisor()], llm=llm, streaming=True)
+    advisory_response = advisory.get_advisory("Test message")
+    signal = advisory_response.state.signals["DefaultAdvisor"]
+    assert signal.signal == "positive"
+    assert signal.reasoning == "Rising prices"
+    # the stream was closed after the signal
+    assert llm.chunks < len(response) // 4 // 2
+
+
+def test_streaming_advisor_truncated(create_advisory):
+    advisory = create_advisory(
+        advisors=[DefaultAdvisor()],
+        llm=LLMFakeSignalModel(
+            responses=['{"signal": "negative", "confidence": 0.6, "reasoning": "Weak']
+        ),
+        streaming=True,
+    )
+    advisory_response = advisory.get_advisory("Test message")
+    signal = advisory_response.state.signals["DefaultAdvisor"]
+    # an incomplete signal is not used
+    assert signal.signal != "negative"
+    assert signal.confidence == 0
+    assert signal.reasoning.startswith("Error generating")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
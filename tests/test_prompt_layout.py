@@ -0,0 +1,49 @@
+import pytest
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact, LLMAdvisorPromptLayout
+
+
+def _get_advisory_response(create_advisory, prompt_layout: LLMAdvisorPromptLayout):
+    advisory = create_advisory(prompt_layout=prompt_layout)
+    return advisory.get_advisory(
+        "Test initial message",
+        [LLMAdvisorDataArtefact(description="Shared data", artefact=[{"a": 1}])],
+    )
+
+
+def test_cache_friendly_prompt_layout(create_advisory):
+    advisory_response = _get_advisory_response(
+        create_advisory, LLMAdvisorPromptLayout.CACHE_FRIENDLY
+    )
+    conversation_a = advisory_response.state.conversations["PersonaAdvisorPersonA"]
+    conversation_b = advisory_response.state.conversations["PersonaAdvisorPersonB"]
+
+    # shared prefix is equal for all advisors
+    assert isinstance(conversation_a[0], SystemMessage)
+    assert conversation_a[0] == conversation_b[0]
+    assert conversation_a[0].content.startswith("Shared data")
+    # advisor specific parts last
+    assert isinstance(conversation_a[1], HumanMessage)
+    assert "First test person" in conversation_a[1].content
+    assert conversation_a[1].content.endswith("Test initial message")
+
+
+def test_usage_metadata(create_advisory):
+    for prompt_layout in LLMAdvisorPromptLayout:
+        advisory_response = _get_advisory_response(create_advisory, prompt_layout)
+        usage_metadata = advisory_response.get_usage_metadata()
+
+        assert set(usage_metadata) == set(advisory_response.state.signals)
+        assert all(usage["input_tokens"] > 0 for usage in usage_metadata.values())
+        response_metadata = advisory_response.get_response_metadata()
+        assert all(
+            metadata["model_name"] == "fake-signal"
+            for metadata in response_metadata.values()
+        )
+        assert set(response_metadata) == set(advisory_response.state.signals)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
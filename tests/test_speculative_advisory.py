@@ -0,0 +1,92 @@
+from time import monotonic, sleep
+
+import pytest
+
+from llm_advisory import LLMAdvisor, LLMAdvisory
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+
+
+class FixedSignalAdvisor(LLMAdvisor):
+    """Advisor returning a fixed signal after a delay"""
+
+    def __init__(self, name: str, signal: str, delay: float = 0.0):
+        super().__init__()
+        self.advisor_name = name
+        self.signal = signal
+        self.delay = delay
+
+    def _generate_signal(self, state, messages, pydantic_model, signal_cache_key=None):
+        sleep(self.delay)
+        return pydantic_model(signal=self.signal, confidence=0.5), None
+
+
+class SlowFirstCallModel(LLMFakeSignalModel):
+    """Fake model with a slow first call"""
+
+    started: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.started += 1
+        if self.started == 1:
+            sleep(1.0)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+def _create_advisory(create_advisory, late_signal: str) -> LLMAdvisory:
+    return create_advisory(
+        advisors=[
+            FixedSignalAdvisor("AdvisorA", "positive"),
+            FixedSignalAdvisor("AdvisorB", "positive"),
+            FixedSignalAdvisor("AdvisorC", late_signal, delay=0.2),
+        ],
+        llm=LLMFakeSignalModel(latency=0.1),
+        speculative_fraction=0.5,
+    )
+
+
+def test_speculative_advisory_agreeing(create_advisory):
+    advisory = _create_advisory(create_advisory, "positive")
+    advisory_response = advisory.get_advisory("Test message")
+    assert advisory_response.provisional_advise_used is True
+    assert advisory.metadata["llm"].calls == 1
+    assert set(advisory_response.state.signals) == {
+        "AdvisorA",
+        "AdvisorB",
+        "AdvisorC",
+        "AdvisoryAdvisor",
+    }
+    # the provisional advise was created from the early signals
+    conversation = advisory_response.state.conversations["AdvisoryAdvisor"]
+    assert "AdvisorC" not in conversation[1].content
+
+
+def test_speculative_advisory_disagreeing(create_advisory):
+    advisory = _create_advisory(create_advisory, "negative")
+    advisory_response = advisory.get_advisory("Test message")
+    assert advisory_response.provisional_advise_used is False
+    assert advisory.metadata["llm"].calls == 2
+    conversation = advisory_response.state.conversations["AdvisoryAdvisor"]
+    assert "AdvisorC" in conversation[1].content
+    assert len(advisory_response.state.messages) == 5
+
+
+def test_speculative_advisory_rejected_not_waited(create_advisory):
+    advisory = _create_advisory(create_advisory, "negative")
+    # the provisional advise is the slow first call
+    advisory.metadata["llm"] = SlowFirstCallModel(latency=0.1)
+    start = monotonic()
+    advisory_response = advisory.get_advisory("Test message")
+    assert advisory_response.provisional_advise_used is False
+    assert monotonic() - start < 0.8
+
+
+def test_advisory_without_speculation(create_advisory):
+    advisory = _create_advisory(create_advisory, "positive")
+    advisory.speculative_fraction = None
+    advisory._workflows.clear()
+    advisory_response = advisory.get_advisory("Test message")
+    assert advisory_response.provisional_advise_used is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,36 @@
+import pytest
+
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    update_dict,
+    extend_list,
+)
+
+
+def test_reducers_merge_in_place():
+    values = {"a": 1}
+    assert update_dict(values, {"b": 2}) is values
+    assert values == {"a": 1, "b": 2}
+    items = [1]
+    assert extend_list(items, [2]) is items
+    assert items == [1, 2]
+
+
+def test_advisory_state(create_advisory):
+    advisory = create_advisory(
+        advisors=[PersonaAdvisor(f"Person {i}", "Test person") for i in range(5)]
+    )
+    advisory_response = advisory.get_advisory(
+        "Test initial message",
+        [LLMAdvisorDataArtefact(description="Test", artefact=[{"a": 1}])],
+    )
+
+    assert len(advisory_response.state.signals) == 6
+    assert len(advisory_response.state.messages) == 7
+    assert advisory_response.advise.signal == "neutral"
+    assert "compiled_data" not in advisory.metadata
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
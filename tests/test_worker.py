@@ -0,0 +1,186 @@
+import signal
+import socket
+import subprocess
+import sys
+from time import monotonic, sleep
+from io import StringIO
+from json import dumps, loads
+
+import pytest
+
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+from llm_advisory.worker import LLMAdvisoryWorker, load_factory, main
+
+# factory module of the entry point test
+FACTORY_MODULE = """
+from llm_advisory import LLMAdvisory
+from llm_advisory.advisors import PersonaAdvisor
+from llm_advisory.helper.llm_fake_model import LLMFakeSignalModel
+
+
+def create_advisory():
+    advisory = LLMAdvisory(
+        advisors=[PersonaAdvisor("Person A", "First test person")],
+        model_provider_name="ollama",
+        model_name="gemma3",
+    )
+    advisory.metadata["llm"] = LLMFakeSignalModel()
+    return advisory
+"""
+
+
+def test_worker_stream(create_advisory):
+    jobs = [
+        {
+            "id": i,
+            "message": "Test message",
+            "input_data": [{"description": "Close", "artefact": [1.0, 2.0 + i]}],
+            "priority": "batch",
+        }
+        for i in range(8)
+    ]
+    jobs.append({"id": "panel", "panel": ["PersonaAdvisorPersonA"]})
+    jobs.append({"id": "unknown", "advisory": "unknown"})
+    lines = [dumps(job) for job in jobs] + ["", "no json", '{"command": "stats"}']
+    output = StringIO()
+    advisory = create_advisory(llm=LLMFakeSignalModel(latency=0.01))
+    with LLMAdvisoryWorker(advisory, max_concurrency=3) as worker:
+        worker.run_stream(StringIO("\n".join(lines)), output)
+        stats = worker.get_stats()
+    results = [loads(line) for line in output.getvalue().splitlines()]
+    assert len(results) == 12
+    by_id = {result.get("id"): result for result in results if "stats" not in result}
+    assert set(range(8)) < set(by_id)
+    assert by_id[0]["response"]["advise"]["signal"] == "neutral"
+    assert set(by_id["panel"]["response"]["state"]["signals"]) == {
+        "PersonaAdvisorPersonA",
+        "AdvisoryAdvisor",
+    }
+    assert by_id["unknown"]["error"].startswith("KeyError")
+    assert by_id[None]["error"].startswith("Invalid job")
+    assert stats.jobs == 9
+    assert stats.errors == 1
+    assert stats.running == 0
+    assert stats.latency_max >= stats.latency_p95 >= stats.latency_p50 > 0
+
+
+def test_worker_invalid_priority(create_advisory):
+    lines = [
+        dumps({"id": 1, "priority": "urgent"}),
+        dumps({"id": 2, "priority": "batch"}),
+    ]
+    output = StringIO()
+    with LLMAdvisoryWorker(create_advisory()) as worker:
+        worker.run_stream(StringIO("\n".join(lines)), output)
+    results = [loads(line) for line in output.getvalue().splitlines()]
+    by_id = {result["id"]: result for result in results}
+    assert "Unknown priority 'urgent'" in by_id[None]["error"]
+    assert by_id[None]["error"].startswith("Invalid job")
+    assert by_id[2]["response"]["advise"]["signal"] == "neutral"
+
+
+def test_worker_main(monkeypatch, capsys, create_advisory):
+    # the factory is loaded from this module
+    monkeypatch.setattr(
+        sys.modules[__name__], "create_advisory", create_advisory, raising=False
+    )
+    assert load_factory(f"{__name__}:create_advisory") is create_advisory
+    with pytest.raises(ValueError):
+        load_factory(__name__)
+    # the app dir is added to a copy of the import path
+    monkeypatch.setattr("sys.path", list(sys.path))
+    monkeypatch.setattr("sys.stdin", StringIO(dumps({"id": 1}) + "\n"))
+    main(["--factory", f"{__name__}:create_advisory"])
+    captured = capsys.readouterr()
+    assert loads(captured.out)["id"] == 1
+    assert loads(captured.err)["jobs"] == 1
+
+
+def test_worker_entry_point(tmp_path):
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "my_advisories.py").write_text(FACTORY_MODULE)
+    # like a console script, the bin dir is on the import path
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "llm-advisory-worker"
+    script.write_text("from llm_advisory.worker import main\nmain()\n")
+
+    def run(cwd, *args):
+        return subprocess.run(
+            [sys.executable, str(script), *args],
+            cwd=cwd,
+            input=dumps({"id": 1}) + "\n",
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+    result = run(app_dir, "--factory", "my_advisories:create_advisory")
+    assert result.returncode == 0, result.stderr
+    assert loads(result.stdout)["response"]["advise"]["signal"] == "neutral"
+
+    args = ["--factory", "my_advisories:create_advisory", "--app-dir", "app"]
+    result = run(tmp_path, *args)
+    assert result.returncode == 0, result.stderr
+    assert loads(result.stdout)["id"] == 1
+
+
+def _connect(path, timeout: float = 30.0) -> socket.socket:
+    """Connects to a Unix socket as soon as the worker is serving"""
+    deadline = monotonic() + timeout
+    while True:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(str(path))
+            return client
+        except (FileNotFoundError, ConnectionRefusedError):
+            client.close()
+            if monotonic() > deadline:
+                raise
+            sleep(0.05)
+
+
+def test_worker_socket(tmp_path):
+    (tmp_path / "my_advisories.py").write_text(FACTORY_MODULE)
+    path = tmp_path / "worker.sock"
+    # stale socket file of a stopped worker
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    assert path.exists()
+
+    args = [
+        sys.executable,
+        "-m",
+        "llm_advisory.worker",
+        "--factory",
+        "my_advisories:create_advisory",
+        "--socket",
+        str(path),
+    ]
+    for _ in range(2):
+        worker = subprocess.Popen(args, cwd=tmp_path, stderr=subprocess.PIPE, text=True)
+        try:
+            with _connect(path) as client:
+                client.sendall((dumps({"id": 1}) + "\n").encode())
+                client.shutdown(socket.SHUT_WR)
+                result = loads(client.makefile().readline())
+            assert result["id"] == 1
+
+            # a second worker does not take over the socket
+            second = subprocess.run(
+                args, cwd=tmp_path, capture_output=True, text=True, timeout=60
+            )
+            assert second.returncode != 0
+            assert "already serving" in second.stderr
+        finally:
+            worker.send_signal(signal.SIGINT)
+            _, stderr = worker.communicate(timeout=60)
+        assert loads(stderr.splitlines()[-1])["jobs"] == 1
+        # the socket file is removed, the worker can be started again
+        assert not path.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])